@@ -0,0 +1,112 @@
+import json
+import math
+import os
+import threading
+
+import config
+from state_file import locked, write_atomic
+
+
+class AdaptiveTimeouts:
+    """Per-host connect and read timeouts derived from each host's latency history.
+
+    Connect samples are the DNS + TCP + TLS time of new connections, read
+    samples the wait for the response headers after connecting. A host's
+    deadline is its p99 sample times `multiplier`, clamped between a floor
+    and a ceiling; until it has `min_samples` the caller's flat timeout is
+    used. Each retry doubles the deadline (up to the ceiling), so a host that
+    has slowed down still gets through, and its slower samples then raise
+    the deadline for later requests. Processes sharing the state file each
+    add their new samples to it on save.
+    """
+
+    PHASES = ('connect', 'read')
+
+    def __init__(self, state_file=config.TIMEOUT_STATE_FILE, history=config.TIMEOUT_HISTORY,
+                 min_samples=config.TIMEOUT_MIN_SAMPLES, percentile=config.TIMEOUT_PERCENTILE,
+                 multiplier=config.TIMEOUT_MULTIPLIER, limits=config.TIMEOUT_LIMITS):
+        """
+        history: latest samples kept per host and phase
+        limits: {'connect': (floor, ceiling), 'read': (floor, ceiling)} in seconds
+        """
+        self.state_file = state_file
+        self.history = history
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.limits = limits
+        self._hosts = self._load()  # host -> {'connect': [seconds, ...], 'read': [...]}
+        self._unsaved = {}  # samples added since the last save, in the same layout
+        self._lock = threading.Lock()
+
+    def timeout(self, host, default, attempt=0):
+        """Get the (connect, read) timeout for attempt number `attempt` of a request to host.
+
+        default is the flat timeout (or tuple) used for a phase without enough history.
+        """
+        defaults = default if isinstance(default, tuple) else (default, default)
+        with self._lock:
+            samples = self._hosts.get(host) or {}
+            return tuple(self._deadline(phase, samples.get(phase) or [], fallback, attempt)
+                         for phase, fallback in zip(self.PHASES, defaults))
+
+    def record(self, host, timings):
+        """Add a response's timings (transport.SessionPool's response.timings) to the host's history"""
+        if timings is None:
+            return  # served from the cache or a cassette
+        handshake = timings['dns'] + timings['connect'] + timings['tls']
+        with self._lock:
+            if handshake > 0:
+                self._add(host, 'connect', handshake)
+            self._add(host, 'read', max(0.0, timings['ttfb'] - handshake))
+
+    def save(self):
+        """Add the samples taken since the last save to the state file, and pick up other processes' samples"""
+        if not self.state_file:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+
+        with locked(self.state_file):
+            hosts = self._load()
+            with self._lock:
+                for host, phases in self._unsaved.items():
+                    for phase, samples in phases.items():
+                        self._append(hosts, host, phase, samples)
+                self._unsaved = {}
+                self._hosts = hosts
+                text = json.dumps(hosts)
+            try:
+                write_atomic(self.state_file, text)
+            except OSError as e:
+                print(f"Error saving latency history: {e}")
+
+    def _deadline(self, phase, samples, fallback, attempt):
+        if len(samples) < self.min_samples:
+            return fallback
+        ordered = sorted(samples)
+        # Nearest-rank percentile
+        value = ordered[min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)]
+        floor, ceiling = self.limits[phase]
+        return round(min(ceiling, max(floor, value * self.multiplier) * 2 ** attempt), 3)
+
+    def _add(self, host, phase, seconds):
+        sample = [round(seconds, 4)]
+        self._append(self._hosts, host, phase, sample)
+        self._append(self._unsaved, host, phase, sample)
+
+    def _append(self, hosts, host, phase, samples):
+        history = hosts.setdefault(host, {}).setdefault(phase, [])
+        history.extend(samples)
+        del history[:-self.history]
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading latency history: {e}")
+            return {}
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Offline scraping benchmark for ScriptWriter
+Runs NewsScraper.scrape_category for every category against a local mock
+server, so timings are repeatable and need no network connection.
+
+    python benchmark.py
+    python benchmark.py --latency 0.2 --jitter 0.1 --rate-429 0.05 --timeout-rate 0.02
+    python benchmark.py --category Crime --passes 3 --json results.json
+    python benchmark.py --together      # all categories in one fetch plan
+    python benchmark.py --category Funny --dead-host www.weirdnews.com --passes 3
+"""
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+
+
+import config
+from adaptive_timeout import AdaptiveTimeouts
+from circuit_breaker import CircuitBreaker
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+from scrapers import NewsScraper
+from topic_store import TopicStore
+from transport import PooledAdapter
+
+
+# Words the synthetic headlines are built from; funny, crime and local words
+# show up often enough for the filtered categories to find topics
+SUBJECTS = ['Man', 'Woman', 'Local dog', 'City council', 'Ohio senator', 'Mayor', 'Teenager',
+            'School board', 'Florida man', 'Retired teacher', 'County sheriff', 'Governor']
+ACTIONS = ['arrested after', 'fined for', 'sentenced over', 'calls police about', 'jokes about',
+           'votes on', 'debates', 'announces plan for', 'caught in', 'sued over', 'praised for']
+OBJECTS = ['bizarre prank', 'stolen traffic cones', 'new road budget', 'weird noise complaint',
+           'hilarious mix-up', 'fraud scheme', 'school levy', 'strange backyard discovery',
+           'tax increase', 'unusual robbery', 'election recount', 'ridiculous parking ticket']
+PLACES = ['in Youngstown', 'in Boardman', 'in Columbus', 'near Canfield', 'in Niles', 'in Cleveland',
+          'in Trumbull County', 'in Mahoning County', 'at the statehouse', 'downtown', '', '']
+
+# Container markup matching each listing layout in extraction.py
+CONTAINER_CLASSES = ['story', 'article-card', 'news-item', 'press-release', 'crime-story', 'post']
+
+# Pages in each synthetic Reddit listing, 12 hours of posts apiece
+REDDIT_PAGES = 4
+
+
+class FixtureSet:
+    """Response bodies for the mock server: recorded files when available, synthetic otherwise.
+
+    Recorded fixtures live at <fixtures dir>/<host>/<path>, with 'index.html'
+    standing in for an empty path. Synthetic fixtures are generated from the
+    URL, so every run serves exactly the same pages.
+    """
+
+    def __init__(self, fixtures_dir=None, items=40, padding=20000):
+        self.fixtures_dir = fixtures_dir
+        self.items = items
+        self.padding = padding
+        self._bodies = {}
+        self._gzipped = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Get (content type, body) for an original URL"""
+        with self._lock:
+            fixture = self._bodies.get(url)
+            if fixture is None:
+                fixture = self._bodies[url] = self._recorded(url) or self._generate(url)
+            return fixture
+
+    def gzipped(self, url):
+        """Get the gzip-compressed body for an original URL"""
+        with self._lock:
+            body = self._gzipped.get(url)
+        if body is None:
+            body = gzip.compress(self.get(url)[1], mtime=0)
+            with self._lock:
+                self._gzipped[url] = body
+        return body
+
+    def _recorded(self, url):
+        if not self.fixtures_dir:
+            return None
+
+        parsed = urlparse(url)
+        path = os.path.join(self.fixtures_dir, parsed.netloc, parsed.path.strip('/') or 'index.html')
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        content_type = 'application/json' if path.endswith('.json') else 'text/html; charset=utf-8'
+        return content_type, body
+
+    def _generate(self, url):
+        rng = random.Random(url)
+        if urlparse(url).path.endswith('.json'):
+            return 'application/json', self._reddit_listing(url, rng)
+        return 'text/html; charset=utf-8', self._news_page(url, rng)
+
+    def _headline(self, rng):
+        return ' '.join(part for part in (
+            rng.choice(SUBJECTS), rng.choice(ACTIONS), rng.choice(OBJECTS), rng.choice(PLACES)) if part)
+
+    def _reddit_listing(self, url, rng):
+        # Combined listings (/r/a+b/hot.json) mix the subreddits; `after` pages go back in
+        # time, `before` returns a short page of posts made since, /by_id re-serves posts
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        now = time.time()
+        if parsed.path.startswith('/by_id/'):
+            names = parsed.path.split('/')[2].rpartition('.')[0].split(',')
+            posts = [(name.split('_', 1)[1], now - rng.randint(60, 24 * 3600)) for name in names]
+            return self._reddit_page(posts, rng, None)
+
+        subreddits = parsed.path.split('/')[2].split('+')
+        if 'before' in query:
+            posts = [(f'{subreddits[i % len(subreddits)]}_new{i}', now - rng.randint(60, 2 * 3600))
+                     for i in range(self.items // 4)]
+            return self._reddit_page(posts, rng, None)
+
+        after = query.get('after', [''])[0]
+        page = int(after.rpartition('_page')[2] or 0) if after else 0
+        posts = []
+        for i in range(self.items):
+            post_id = page * self.items + i
+            posts.append((f'{subreddits[i % len(subreddits)]}_{post_id}',
+                          now - page * 12 * 3600 - rng.randint(60, 12 * 3600)))
+        next_page = f't3_page{page + 1}' if page + 1 < REDDIT_PAGES else None
+        return self._reddit_page(posts, rng, next_page)
+
+    def _reddit_page(self, posts, rng, after):
+        """Build a listing from (<subreddit>_<id>, created) pairs"""
+        children = []
+        for post_id, created in posts:
+            subreddit = post_id.split('_', 1)[0]
+            children.append({'kind': 't3', 'data': {
+                'name': f't3_{post_id}',
+                'subreddit': subreddit,
+                'title': self._headline(rng),
+                'score': rng.randint(0, 5000),
+                'created_utc': created,
+                'permalink': f'/r/{subreddit}/comments/{post_id}/',
+                'selftext': ' '.join(self._headline(rng) for _ in range(rng.randint(0, 6))),
+                'url': f'https://example.com/story/{post_id}',
+                'stickied': post_id.endswith('_0')
+            }})
+        return json.dumps({'kind': 'Listing', 'data': {'children': children, 'after': after}}).encode()
+
+    def _news_page(self, url, rng):
+        now = datetime.now()
+        parts = ['<!DOCTYPE html><html><head><title>News</title>',
+                 '<script>window.analytics = {"id": 1};</script><style>.story { margin: 0; }</style>',
+                 '</head><body><nav><ul>',
+                 ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(30)),
+                 '</ul></nav><main>']
+
+        for i in range(self.items):
+            published = now - timedelta(minutes=rng.randint(5, 36 * 60))
+            cls = rng.choice(CONTAINER_CLASSES)
+            tag = 'article' if i % 3 == 0 else 'div'
+            href = f'/news/{published:%Y/%m/%d}/story-{i}' if i % 2 else f'/story/{i}.html'
+
+            # Rotate between the ways real sites show publish times
+            style = i % 4
+            if style == 0:
+                time_html = f'<time datetime="{published.isoformat(timespec="seconds")}">{published:%b %d}</time>'
+            elif style == 1:
+                time_html = f'<span class="date">{published:%B %d, %Y}</span>'
+            elif style == 2:
+                hours = max(1, int((now - published).total_seconds() // 3600))
+                time_html = f'<span class="timestamp">{hours} hours ago</span>'
+            else:
+                time_html = ''
+
+            parts.append(f'<{tag} class="{cls}"><h3><a href="{href}">{self._headline(rng)}</a></h3>'
+                         f'{time_html}<p>{self._headline(rng)}. {self._headline(rng)}.</p>'
+                         f'<script>track({i});</script></{tag}>')
+
+        # Boilerplate around the listing, as on real pages
+        parts.append('</main><aside>')
+        filler = '<div class="ad-slot"><p>Advertisement</p></div>'
+        parts.append(filler * (self.padding // len(filler)))
+        parts.append('</aside><footer>&copy; News</footer></body></html>')
+        return ''.join(parts).encode()
+
+
+class MockNewsHandler(BaseHTTPRequestHandler):
+    """Serves /<scheme>/<host>/<path> with the fixture for the original URL"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        if self.path == '/__stats':
+            return self._send(200, 'application/json', json.dumps(server.stats()).encode())
+        if self.path == '/__reset':
+            server.reset()
+            return self._send(200, 'text/plain', b'ok')
+
+        scheme, _, rest = self.path.lstrip('/').partition('/')
+        url = f'{scheme}://{rest}'
+        fault, delay = server.plan(url)
+
+        time.sleep(delay)
+        if fault == 'timeout':
+            # Hang past the client's read timeout, then drop the connection
+            server.count(url, 'timeouts', 0)
+            time.sleep(server.options['hang'])
+            self.close_connection = True
+            return
+        if fault == '429':
+            server.count(url, 'throttled', 0)
+            return self._send(429, 'text/plain', b'Too Many Requests',
+                              {'Retry-After': str(server.options['retry_after'])})
+
+        content_type, body = server.fixtures.get(url)
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            server.count(url, 'not_modified', 0)
+            return self._send(304, None, b'', {'ETag': etag})
+
+        headers = {'ETag': etag, 'Last-Modified': server.last_modified}
+        if server.options['compression'] and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = server.fixtures.gzipped(url)
+            headers['Content-Encoding'] = 'gzip'
+
+        server.count(url, 'ok', len(body))
+        self._send(200, content_type, body, headers)
+
+    def _send(self, status, content_type, body, headers=None):
+        try:
+            self.send_response(status)
+            if content_type:
+                self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockNewsServer(ThreadingHTTPServer):
+    """Local stand-in for every site the scraper visits, with injectable faults"""
+
+    daemon_threads = True
+
+    def __init__(self, options, fixtures):
+        super().__init__(('127.0.0.1', 0), MockNewsHandler)
+        self.options = options
+        self.fixtures = fixtures
+        self.last_modified = formatdate(usegmt=True)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._attempts = {}
+            self._stats = {'requests': 0, 'bytes': 0, 'ok': 0, 'not_modified': 0, 'throttled': 0, 'timeouts': 0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def plan(self, url):
+        """Decide the fault and latency for this request.
+
+        Decisions depend only on the seed, the URL and how many times it has
+        been requested, so thread scheduling doesn't change them.
+        """
+        with self._lock:
+            attempt = self._attempts.get(url, 0)
+            self._attempts[url] = attempt + 1
+
+        options = self.options
+        rng = random.Random(f"{options['seed']}:{url}:{attempt}")
+        delay = max(0.0, options['latency'] + rng.uniform(-options['jitter'], options['jitter']))
+
+        if urlparse(url).netloc in options['dead_hosts']:
+            return 'timeout', delay
+
+        roll = rng.random()
+        if roll < options['rate_429']:
+            return '429', delay
+        if roll < options['rate_429'] + options['timeout_rate']:
+            return 'timeout', delay
+        return None, delay
+
+    def count(self, url, outcome, size):
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats[outcome] += 1
+            self._stats['bytes'] += size
+
+
+def _serve(options, port_queue):
+    """Mock server process entry point"""
+    fixtures = FixtureSet(options['fixtures'], options['items'], options['padding'])
+    server = MockNewsServer(options, fixtures)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class MockServerAdapter(PooledAdapter):
+    """Sends every request to the mock server instead of the real host"""
+
+    def __init__(self, base_url, timeout, stats=None):
+        super().__init__(stats)
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        parsed = urlparse(original_url)
+        request.url = f'{self.base_url}/{parsed.scheme}/{parsed.netloc}{parsed.path or "/"}'
+        if parsed.query:
+            request.url += '?' + parsed.query
+
+        # Scrapers wait 10-15s; keep injected timeouts short (adaptive ones may be shorter still)
+        timeout = kwargs.get('timeout')
+        if isinstance(timeout, tuple):
+            kwargs['timeout'] = tuple(min(self.timeout, t) if t else self.timeout for t in timeout)
+        else:
+            kwargs['timeout'] = self.timeout
+
+        response = super().send(request, **kwargs)
+        response.url = original_url
+        request.url = original_url
+        return response
+
+
+class ScrapeBenchmark:
+    """Runs each category against the mock server and collects per-pass measurements"""
+
+    def __init__(self, base_url, options):
+        self.base_url = base_url
+        self.options = options
+
+    def run(self, categories):
+        results = []
+        # --together scrapes every category in one fetch plan, as a single row
+        groups = [categories] if self.options['together'] else [[category] for category in categories]
+        for group in groups:
+            cache_dir = tempfile.mkdtemp(prefix='scraper-bench-')
+            try:
+                for run in range(1, self.options['passes'] + 1):
+                    result = self.run_pass(group, cache_dir)
+                    result['pass'] = run
+                    results.append(result)
+                    print(self.format_row(result), flush=True)
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        return results
+
+    def run_pass(self, categories, cache_dir):
+        """Scrape categories with an empty topic store; the response cache carries over between passes"""
+        scraper = self._build_scraper(cache_dir)
+        self._server_request('/__reset')
+
+        quiet = contextlib.nullcontext() if self.options['verbose'] else contextlib.redirect_stdout(io.StringIO())
+        track_memory = self.options['memory']
+        if track_memory:
+            tracemalloc.start()
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        with quiet:
+            topics = [topic for _, category_topics in scraper.scrape_categories_iter(categories)
+                      for topic in category_topics]
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        peak = 0
+        if track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        scraper.fetcher.executor.shutdown()
+        scraper.topic_store.close()
+        scraper.session.close()
+        transport = scraper.session.stats.snapshot()
+
+        stats = self._server_request('/__stats')
+        return {
+            'category': categories[0] if len(categories) == 1 else f"{len(categories)} categories together",
+            'topics': len(topics),
+            'wall_seconds': round(wall, 3),
+            'cpu_seconds': round(cpu, 3),
+            'peak_memory_bytes': peak,
+            'requests': stats['requests'],
+            'connections': transport['connections'],
+            'bytes': stats['bytes'],
+            'body_bytes': transport['body_bytes'],
+            'not_modified': stats['not_modified'],
+            'throttled': stats['throttled'],
+            'timeouts': stats['timeouts']
+        }
+
+    def _build_scraper(self, cache_dir):
+        scraper = NewsScraper(topic_store=TopicStore(':memory:'))
+
+        adapter = MockServerAdapter(self.base_url, self.options['client_timeout'], scraper.session.stats)
+        scraper.session.mount('http://', adapter)
+        scraper.session.mount('https://', adapter)
+
+        # A private limiter so one category's throttling doesn't leak into the next
+        if self.options['rate_limit']:
+            scraper.fetcher.limiter = RateLimiter()
+        else:
+            scraper.fetcher.limiter = RateLimiter(request_delay=0, host_delays={})
+
+        # Failing hosts are remembered between passes, like the response cache
+        scraper.fetcher.breaker = CircuitBreaker(os.path.join(cache_dir, 'circuit_breaker.json'))
+        scraper.fetcher.timeouts = AdaptiveTimeouts(os.path.join(cache_dir, 'host_latency.json'))
+
+        if self.options['cache']:
+            scraper.response_cache = ResponseCache(cache_dir, self.options['cache_ttl'])
+            scraper.fetcher.cache = scraper.response_cache
+        else:
+            scraper.response_cache = scraper.fetcher.cache = None
+        return scraper
+
+    def _server_request(self, path):
+        with urlopen(self.base_url + path, timeout=10) as response:
+            body = response.read()
+        return json.loads(body) if path == '/__stats' else body
+
+    @staticmethod
+    def format_header():
+        return (f"{'Category':<44} {'Pass':>4} {'Topics':>6} {'Wall s':>7} {'CPU s':>6} "
+                f"{'Peak MB':>7} {'Reqs':>5} {'Conns':>5} {'KB':>7} {'304':>4} {'429':>4} {'T/O':>4}")
+
+    @staticmethod
+    def format_row(result):
+        return (f"{result['category'][:44]:<44} {result['pass']:>4} {result['topics']:>6} "
+                f"{result['wall_seconds']:>7.2f} {result['cpu_seconds']:>6.2f} "
+                f"{result['peak_memory_bytes'] / 1048576:>7.1f} {result['requests']:>5} {result['connections']:>5} "
+                f"{result['bytes'] / 1024:>7.0f} {result['not_modified']:>4} "
+                f"{result['throttled']:>4} {result['timeouts']:>4}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark NewsScraper against a local mock news server")
+    parser.add_argument('--category', action='append',
+                        help="only run categories containing this text (repeatable)")
+    parser.add_argument('--passes', type=int, default=2,
+                        help="runs per category; later passes reuse the response cache (default: 2)")
+    parser.add_argument('--latency', type=float, default=0.05, help="server latency in seconds (default: 0.05)")
+    parser.add_argument('--jitter', type=float, default=0.02, help="+/- random latency in seconds (default: 0.02)")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=float, default=1, help="Retry-After sent with 429s (default: 1)")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument('--dead-host', dest='dead_hosts', action='append', default=[],
+                        help="host whose every request hangs, e.g. www.weirdnews.com (repeatable)")
+    parser.add_argument('--client-timeout', type=float, default=1.0,
+                        help="request timeout used instead of the scrapers' 10-15s (default: 1.0)")
+    parser.add_argument('--items', type=int, default=40, help="headlines/posts per synthetic page (default: 40)")
+    parser.add_argument('--padding', type=int, default=20000,
+                        help="bytes of boilerplate around each synthetic listing (default: 20000)")
+    parser.add_argument('--fixtures', help="directory of recorded <host>/<path> fixtures to serve instead")
+    parser.add_argument('--seed', type=int, default=1, help="seed for latency and fault injection (default: 1)")
+    parser.add_argument('--no-cache', dest='cache', action='store_false', help="disable the response cache")
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                        help="response cache TTL; 0 makes later passes revalidate with 304s (default: 0)")
+    parser.add_argument('--no-compression', dest='compression', action='store_false',
+                        help="serve uncompressed bodies even when the client accepts gzip")
+    parser.add_argument('--no-rate-limit', dest='rate_limit', action='store_false',
+                        help="drop per-host request spacing to isolate fetch and parse costs")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip tracemalloc, which slows parsing noticeably")
+    parser.add_argument('--together', action='store_true',
+                        help="scrape the categories in one fetch plan instead of one at a time")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--verbose', action='store_true', help="show scraper output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = vars(args)
+    options['hang'] = args.client_timeout + 1
+
+    categories = config.CATEGORIES
+    if args.category:
+        categories = [c for c in categories if any(text.lower() in c.lower() for text in args.category)]
+    if not categories:
+        print("No categories match")
+        return 1
+
+    # The server runs in its own process so its work doesn't count towards our CPU time
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(options, port_queue), daemon=True)
+    server.start()
+    base_url = f'http://127.0.0.1:{port_queue.get(timeout=30)}'
+
+    print("ScriptWriter Scraping Benchmark")
+    print("=" * 50)
+    print(f"Mock server: {base_url}  latency={args.latency}s jitter={args.jitter}s "
+          f"429={args.rate_429:.0%} timeouts={args.timeout_rate:.0%} seed={args.seed}")
+    print()
+    print(ScrapeBenchmark.format_header())
+
+    try:
+        results = ScrapeBenchmark(base_url, options).run(categories)
+    finally:
+        server.terminate()
+        server.join()
+
+    print()
+    for run in range(1, args.passes + 1):
+        runs = [r for r in results if r['pass'] == run]
+        print(f"Pass {run} total: {sum(r['wall_seconds'] for r in runs):.2f}s wall, "
+              f"{sum(r['cpu_seconds'] for r in runs):.2f}s CPU, {sum(r['requests'] for r in runs)} requests, "
+              f"{sum(r['connections'] for r in runs)} connections, {sum(r['bytes'] for r in runs) / 1024:.0f} KB "
+              f"({sum(r['body_bytes'] for r in runs) / 1024:.0f} KB decompressed)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': options, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
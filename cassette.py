@@ -0,0 +1,173 @@
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Environment switches, so a scrape can be recorded without code changes:
+#   SCRAPER_CASSETTE=captures/run.jsonl.gz SCRAPER_CASSETTE_MODE=record python main.py
+CASSETTE_ENV = 'SCRAPER_CASSETTE'
+CASSETTE_MODE_ENV = 'SCRAPER_CASSETTE_MODE'
+CASSETTE_REALTIME_ENV = 'SCRAPER_CASSETTE_REALTIME'
+
+MODES = ('record', 'replay')
+
+
+class Cassette:
+    """Recorded HTTP exchanges, stored as gzipped JSON lines (one response per line).
+
+    A URL requested several times is replayed in the order it was recorded,
+    then its last response is repeated.
+    """
+
+    # Headers that describe the wire format rather than the (decoded) body we store
+    SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+    def __init__(self, path):
+        self.path = path
+        self._records = {}   # (method, url) -> [record, ...]
+        self._played = {}    # (method, url) -> records replayed so far
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the cassette from disk; returns the number of recorded responses"""
+        count = 0
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self._records.setdefault((record['method'], record['url']), []).append(record)
+                count += 1
+        return count
+
+    def record(self, request, response, elapsed):
+        """Append a response to the cassette (the body must already be read)"""
+        body = response.content or b''
+        try:
+            body_text, body_encoding = body.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            body_text, body_encoding = base64.b64encode(body).decode('ascii'), 'base64'
+
+        record = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in self.SKIP_HEADERS},
+            'body': body_text,
+            'body_encoding': body_encoding,
+            'elapsed': round(elapsed, 4)
+        }
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+            self._file.write(line)
+            # Flushed per response so an interrupted scrape still leaves a usable cassette
+            self._file.flush()
+
+    def next_record(self, method, url):
+        """Get the next recorded response for a request, or None"""
+        key = (method, url)
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                return None
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+            return records[min(played, len(records) - 1)]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Transport adapter that records real responses to a cassette or replays them with no network"""
+
+    def __init__(self, cassette, mode, realtime=False):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(MODES)}, got {mode!r}")
+
+        super().__init__()
+        self.cassette = cassette
+        self.mode = mode
+        self.realtime = realtime
+
+        if mode == 'replay':
+            count = cassette.load()
+            print(f"Replaying {count} recorded responses from {cassette.path}")
+        else:
+            print(f"Recording responses to {cassette.path}")
+
+    def send(self, request, **kwargs):
+        if self.mode == 'record':
+            start = time.perf_counter()
+            response = super().send(request, **kwargs)
+            response.content  # read the body so its transfer time is part of elapsed
+            self.cassette.record(request, response, time.perf_counter() - start)
+            return response
+
+        record = self.cassette.next_record(request.method, request.url)
+        if record is None:
+            raise requests.ConnectionError(f"No recorded response for {request.method} {request.url}",
+                                           request=request)
+
+        if self.realtime:
+            time.sleep(record['elapsed'])
+        return self._build_response(request, record)
+
+    def close(self):
+        self.cassette.close()
+        super().close()
+
+    def _build_response(self, request, record):
+        body = record['body']
+        if record['body_encoding'] == 'base64':
+            body = base64.b64decode(body)
+        else:
+            body = body.encode('utf-8')
+
+        response = requests.Response()
+        response.status_code = record['status']
+        response.reason = record['reason']
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict(record['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.elapsed = timedelta(seconds=record['elapsed'])
+        response._content = body
+        response.from_cassette = True
+        return response
+
+
+def cassette_adapter_from_env(path=None, mode=None, realtime=None):
+    """Build a CassetteAdapter from arguments, falling back to the SCRAPER_CASSETTE* variables.
+
+    Returns None when no cassette is configured. Without an explicit mode an
+    existing cassette is replayed and a missing one is recorded.
+    """
+    path = path or os.environ.get(CASSETTE_ENV)
+    if not path:
+        return None
+
+    mode = mode or os.environ.get(CASSETTE_MODE_ENV) or ('replay' if os.path.exists(path) else 'record')
+    if realtime is None:
+        realtime = os.environ.get(CASSETTE_REALTIME_ENV, '').lower() in ('1', 'true', 'yes')
+
+    return CassetteAdapter(Cassette(path), mode.lower(), realtime)
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+import config
+from state_file import locked, write_atomic
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} is failing; skipped for another {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker with failure history persisted across runs.
+
+    After `threshold` consecutive failures (timeouts, connection errors, 5xx)
+    a host is skipped for `cooldown` seconds, then a single probe request is
+    let through: success closes the circuit, failure opens it again for twice
+    as long (up to max_cooldown). The state file is shared by every process
+    using it (the app, prefetch.py, scrape_topics.py); each update merges into it.
+    """
+
+    def __init__(self, state_file=config.CIRCUIT_STATE_FILE, threshold=config.CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown=config.CIRCUIT_COOLDOWN, max_cooldown=config.CIRCUIT_MAX_COOLDOWN):
+        self.state_file = state_file
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._hosts = self._load()  # host -> {'failures', 'opened_at', 'cooldown'}
+        self._probes = {}  # host -> time its half-open probe was let through
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def allow(self, host):
+        """Check that a request to host may be sent; raises CircuitOpenError if not"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state['opened_at'] is None:
+                return
+
+            now = time.time()
+            retry_in = state['opened_at'] + state['cooldown'] - now
+            if retry_in > 0:
+                raise CircuitOpenError(host, retry_in)
+
+            # Half-open: one probe at a time; one that never reported back is replaced
+            probe = self._probes.get(host)
+            if probe is not None and now - probe < config.CIRCUIT_PROBE_TIMEOUT:
+                raise CircuitOpenError(host, config.CIRCUIT_PROBE_TIMEOUT - (now - probe))
+            self._probes[host] = now
+
+    def record_success(self, host):
+        with self._lock:
+            self._probes.pop(host, None)
+            state = self._hosts.pop(host, None)
+            if state is None:
+                return
+        if state['opened_at'] is not None:
+            print(f"{host} is responding again")
+        self._save(host)
+
+    def record_failure(self, host):
+        with self._lock:
+            probing = self._probes.pop(host, None) is not None
+            state = self._hosts.setdefault(host, {'failures': 0, 'opened_at': None, 'cooldown': self.cooldown})
+            state['failures'] += 1
+
+            if probing:
+                state['cooldown'] = min(state['cooldown'] * 2, self.max_cooldown)
+            elif state['opened_at'] is not None or state['failures'] < self.threshold:
+                state = None
+            if state is not None:
+                state['opened_at'] = time.time()
+                print(f"{host} failed {state['failures']} times in a row; skipping it for {state['cooldown']:.0f}s")
+        self._save(host)
+
+    def state(self, host):
+        """Get a host's failure count and when it will be tried again (unix time), or None if healthy"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                return None
+            retry_at = state['opened_at'] + state['cooldown'] if state['opened_at'] is not None else None
+            return {'failures': state['failures'], 'retry_at': retry_at}
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading circuit breaker state: {e}")
+            return {}
+
+    def _save(self, host):
+        """Write host's state into the state file, picking up other processes' changes to the rest"""
+        if not self.state_file:
+            return
+        with self._save_lock, locked(self.state_file):
+            hosts = self._load()
+            with self._lock:
+                if host in self._hosts:
+                    hosts[host] = self._hosts[host]
+                else:
+                    hosts.pop(host, None)
+                self._hosts = hosts
+                text = json.dumps(hosts, indent=2)
+            try:
+                write_atomic(self.state_file, text)
+            except OSError as e:
+                print(f"Error saving circuit breaker state: {e}")
@@ -14,13 +14,74 @@ MAX_TOPICS_PER_SEARCH = 100
 SEARCH_TIMEOUT = 30  # seconds
 REQUEST_DELAY = 1  # seconds between requests
 MAX_RETRIES = 3
+RATE_LIMIT_BURST = 1  # requests a host may receive back-to-back before REQUEST_DELAY applies
+RETRY_BACKOFF_BASE = 2  # seconds; doubled on each retry (with jitter)
+RETRY_BACKOFF_MAX = 60  # seconds; also caps how long a Retry-After header can hold a host
+
+# Per-host overrides for REQUEST_DELAY (seconds between requests)
+HOST_REQUEST_DELAYS = {
+    'www.reddit.com': 2
+}
+MAX_CONCURRENT_REQUESTS = 8  # sources fetched in parallel (one request at a time per host)
+HTTP_POOL_HOSTS = 64  # hosts whose keep-alive connections stay open (requests keeps only 10)
+HTTP_POOL_MAXSIZE = 2  # idle connections kept per host; requests to a host are serialized
+STREAM_CHUNK_SIZE = 16 * 1024  # bytes handed to the listing parser at a time
+STREAM_MAX_BYTES = 2 * 1024 * 1024  # listing pages are cut off here; headlines sit near the top
+
+# Circuit breaker: hosts that keep failing are skipped instead of waiting out their timeouts
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive failed requests (timeouts, connection errors, 5xx) before skipping
+CIRCUIT_COOLDOWN = 600  # seconds a host is skipped before one probe request is let through
+CIRCUIT_MAX_COOLDOWN = 6 * 3600  # seconds; the cooldown doubles after each failed probe up to this
+CIRCUIT_PROBE_TIMEOUT = 120  # seconds before a probe that never finished is replaced by another
+CIRCUIT_STATE_FILE = "./cache/circuit_breaker.json"
+
+# Adaptive timeouts: each host's connect/read deadlines follow its own latency history
+TIMEOUT_HISTORY = 100  # latest latency samples kept per host and phase
+TIMEOUT_MIN_SAMPLES = 5  # below this the scrapers' flat 10-15s timeout is used
+TIMEOUT_PERCENTILE = 0.99
+TIMEOUT_MULTIPLIER = 2  # deadline = p99 latency x this, within TIMEOUT_LIMITS
+TIMEOUT_LIMITS = {
+    'connect': (1.0, 10.0),  # (floor, ceiling) seconds
+    'read': (2.0, 30.0)  # above the flat 15s, so slow but reliable hosts aren't cut off
+}
+TIMEOUT_STATE_FILE = "./cache/host_latency.json"
+
+# HTTP response cache
+HTTP_CACHE_DIR = "./cache/http"
+HTTP_CACHE_TTL = 300  # seconds a cached page is served without revalidating
+HTTP_CACHE_MAX_AGE = 7 * 24 * 3600  # seconds before an unused entry is deleted
 
 # Time-based search windows (in hours)
 TIME_WINDOWS = [2, 6, 12, 24]
 
+# Topic store (SQLite)
+TOPIC_DB_FILE = "topics.db"
+TOPIC_STORE_MAX_AGE = 600  # seconds a category's stored topics are served without re-scraping
+TOPIC_RETENTION_DAYS = 30
+
+# Background prefetching
+PREFETCH_ENABLED = False  # opt in under Settings; refreshes every category while the app is open
+PREFETCH_INTERVAL = 480  # seconds; below TOPIC_STORE_MAX_AGE so Generate Topics finds fresh topics
+PREFETCH_CHECK_INTERVAL = 30  # seconds between checks for stale categories
+
+# Profiling (off unless SCRIPTWRITER_PROFILE=1 or enabled in Settings)
+PROFILE_DIR = "./logs/profiles"  # a .pstats file and a memory report per profiled action
+PROFILE_TOP_ALLOCATIONS = 25  # allocation sites listed in each memory report
+PROFILE_TRACEBACK_FRAMES = 1  # frames tracemalloc keeps per allocation; more is slower
+
+# Titles whose word sets overlap more than this (Jaccard similarity) are duplicates
+DUPLICATE_SIMILARITY_THRESHOLD = 0.7
+
 # Reddit API settings
-REDDIT_LIMIT = 25  # posts per subreddit
+REDDIT_LIMIT = 100  # posts per listing page (Reddit's maximum)
+REDDIT_MAX_PAGES = 3  # listing pages followed with `after` cursors per combined listing
 REDDIT_SORT = "hot"  # hot, new, top
+REDDIT_INCREMENTAL = True  # after the first scrape, fetch only newer posts from the 'new' listing
+REDDIT_SETTLE_TIME = 3600  # seconds; younger posts are fetched again next time so their scores can grow
+REDDIT_SCORE_REFRESH_INTERVAL = 1800  # seconds between score refreshes of stored posts in incremental mode
+# Low-volume subreddits fetched as their own listing: in a combined hot listing
+# with busy subreddits their posts rarely make it onto the first pages
+REDDIT_SEPARATE_SUBREDDITS = ['floridaman']
 
 # ChatGPT settings
 CHATGPT_TIMEOUT = 60  # seconds
@@ -29,6 +90,18 @@ SCRIPT_TARGET_DURATION = 75  # seconds (1:15) - TikTok minimum
 SCRIPT_PLATFORM = "TikTok"  # Target platform
 SCRIPT_STYLE = "YourPalBones, Jon Stewart, John Oliver blend"
 
+# Topic categories, in dropdown order
+CATEGORIES = [
+    "US Political News",
+    "Ohio Political News",
+    "Local Ohio News (Columbiana, Trumbull, Mahoning Counties)",
+    "Funny Stories (US National)",
+    "Local Funny Stories (Columbiana, Trumbull, Mahoning Counties)",
+    "Funny Criminal Stories (US National)",
+    "Funny Criminal Stories (Ohio Statewide)",
+    "Funny Criminal Stories (Columbiana, Mahoning, Trumbull Counties)"
+]
+
 # File paths
 SCRIPTS_DIR = "./scripts"
 LOGS_DIR = "./logs"
@@ -48,6 +121,12 @@ CRIME_KEYWORDS = [
     'prison', 'court', 'trial', 'guilty', 'sentence', 'fine'
 ]
 
+# Labels used by the content classifier
+CONTENT_KEYWORDS = {
+    'funny': FUNNY_KEYWORDS,
+    'crime': CRIME_KEYWORDS
+}
+
 # News sources by category
 NEWS_SOURCES = {
     'political': [
@@ -72,6 +151,10 @@ NEWS_SOURCES = {
     'crime_news': [
         'https://www.crimeonline.com',
         'https://www.crimestoppers.com'
+    ],
+    'ohio_crime': [
+        'https://www.cleveland.com/crime',
+        'https://www.dispatch.com/news/crime'
     ]
 }
 
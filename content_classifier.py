@@ -0,0 +1,63 @@
+import re
+from bisect import bisect_right
+
+import config
+
+
+class ContentClassifier:
+    """Keyword classifier compiled once into a single word-boundary regex.
+
+    Keywords only match whole words (plus a simple inflection), so 'fine' no
+    longer matches 'define' and 'odd' no longer matches 'oddly'.
+    """
+
+    # Inflections accepted after a keyword: 'prank' -> 'pranks', 'pranked'; 'laugh' -> 'laughing'
+    SUFFIXES = r'(?:s|es|d|ed|ing)?'
+
+    def __init__(self, keywords_by_label=None):
+        if keywords_by_label is None:
+            keywords_by_label = config.CONTENT_KEYWORDS
+
+        # A keyword may belong to several labels
+        self._labels = {}
+        for label, keywords in keywords_by_label.items():
+            for keyword in keywords:
+                self._labels.setdefault(keyword.lower(), set()).add(label)
+
+        # Longest first so 'arrested' wins over 'arrest'
+        alternation = '|'.join(re.escape(keyword) for keyword in sorted(self._labels, key=len, reverse=True))
+        self.pattern = re.compile(rf'\b({alternation}){self.SUFFIXES}\b', re.IGNORECASE)
+
+    def classify(self, text):
+        """Get {label: [(start, end), ...]} for every keyword match in text"""
+        return self.classify_batch([text])[0]
+
+    def classify_batch(self, texts):
+        """Classify many texts with one regex scan; returns one {label: spans} dict per text"""
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        # Newlines are word boundaries, so no match can span two texts
+        results = [{} for _ in texts]
+        for match in self.pattern.finditer('\n'.join(texts)):
+            index = bisect_right(starts, match.start()) - 1
+            span = (match.start() - starts[index], match.end() - starts[index])
+            for label in self._labels[match.group(1).lower()]:
+                results[index].setdefault(label, []).append(span)
+
+        return results
+
+    def has_label(self, text, label):
+        """Check if text contains a keyword for label"""
+        for match in self.pattern.finditer(text):
+            if label in self._labels[match.group(1).lower()]:
+                return True
+        return False
+
+    def filter(self, topics, label):
+        """Keep the topics whose titles match label"""
+        matches = self.classify_batch([topic['title'] for topic in topics])
+        return [topic for topic, labels in zip(topics, matches) if label in labels]
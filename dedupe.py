@@ -0,0 +1,83 @@
+import random
+import re
+import zlib
+
+import config
+
+
+class NearDuplicateIndex:
+    """Incremental near-duplicate title index using MinHash signatures and LSH banding.
+
+    Titles sharing an LSH band with an indexed title are confirmed with the exact
+    word-set Jaccard similarity, so "duplicate" keeps the meaning of the old
+    pairwise check (similarity above the threshold) while inserts only touch the
+    few titles in matching buckets instead of every title seen so far.
+    """
+
+    # 20 bands of 3 rows: a pair at 0.7 similarity shares a band with probability > 0.999
+    BANDS = 20
+    ROWS = 3
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, threshold=config.DUPLICATE_SIMILARITY_THRESHOLD, seed=1):
+        self.threshold = threshold
+        rng = random.Random(seed)
+        self._coefficients = [(rng.randrange(1, self._PRIME), rng.randrange(0, self._PRIME))
+                              for _ in range(self.BANDS * self.ROWS)]
+        self._buckets = [{} for _ in range(self.BANDS)]
+        self._word_sets = []
+
+    def __len__(self):
+        return len(self._word_sets)
+
+    @staticmethod
+    def normalize(title):
+        """Get the word set used to compare a title"""
+        normalized_title = re.sub(r'[^\w\s]', '', title.lower().strip())
+        return frozenset(normalized_title.split())
+
+    def is_duplicate(self, title):
+        """Check if a title is similar to one already in the index"""
+        words = self.normalize(title)
+        if not words:
+            return False
+        return self._find(words, self._band_keys(words)) is not None
+
+    def add(self, title):
+        """Index a title unless it duplicates an indexed one; returns True if it was added"""
+        words = self.normalize(title)
+        if not words:
+            return True
+
+        band_keys = self._band_keys(words)
+        if self._find(words, band_keys) is not None:
+            return False
+
+        entry_id = len(self._word_sets)
+        self._word_sets.append(words)
+        for buckets, key in zip(self._buckets, band_keys):
+            buckets.setdefault(key, []).append(entry_id)
+        return True
+
+    def _find(self, words, band_keys):
+        """Get the id of an indexed title similar to words, or None"""
+        checked = set()
+        for buckets, key in zip(self._buckets, band_keys):
+            for entry_id in buckets.get(key, ()):
+                if entry_id in checked:
+                    continue
+                checked.add(entry_id)
+                if self._jaccard(words, self._word_sets[entry_id]) > self.threshold:
+                    return entry_id
+        return None
+
+    def _band_keys(self, words):
+        """Split the MinHash signature of a word set into one hashable key per band"""
+        hashes = [zlib.crc32(word.encode('utf-8')) for word in words]
+        signature = [min((a * h + b) % self._PRIME for h in hashes) for a, b in self._coefficients]
+        return [tuple(signature[i:i + self.ROWS]) for i in range(0, len(signature), self.ROWS)]
+
+    @staticmethod
+    def _jaccard(words1, words2):
+        intersection = len(words1 & words2)
+        return intersection / (len(words1) + len(words2) - intersection)
@@ -0,0 +1,259 @@
+import codecs
+import re
+
+from lxml import etree
+from requests.compat import chardet
+
+
+# Precompiled lookups run against each (small) candidate subtree
+_FIRST_LINK = etree.XPath('descendant::a[@href][1]')
+_TIME_DATETIME = etree.XPath('descendant-or-self::time[@datetime][1]/@datetime')
+_HEADINGS = {
+    tags: etree.XPath('descendant::*[%s][1]' % ' or '.join(f'self::{tag}' for tag in tags))
+    for tags in [('h1', 'h2', 'h3'), ('h1', 'h2', 'h3', 'h4', 'h5')]
+}
+
+# <meta charset> or <meta http-equiv="Content-Type">, which libxml2 reads itself
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=', re.IGNORECASE)
+
+
+def sniff_encoding(head):
+    """Guess the encoding of a page whose headers declare none from its first bytes.
+
+    Returns None if a <meta> tag declares it, as libxml2 honors that, then
+    UTF-8 if the bytes are valid UTF-8, else the charset detector's guess.
+    Left to itself libxml2 would decode an undeclared page as Latin-1.
+    """
+    if _META_CHARSET.search(head[:4096]):
+        return None
+    try:
+        # Incremental, so a character cut off at the end of the chunk still counts as UTF-8
+        codecs.getincrementaldecoder('utf-8')().decode(head)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return chardet.detect(head)['encoding']
+
+
+class _StrainedTreeTarget:
+    """lxml parser target that only builds the subtrees of candidate containers.
+
+    Everything outside a candidate (navigation, ads, scripts, styles) is dropped as
+    it streams past, so the tree we keep is a small fraction of the page and the
+    candidates are collected in the same pass that parses them.
+    """
+
+    # Subtrees whose text never belongs in a topic
+    SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe'}
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.builder = etree.TreeBuilder()
+        self.builder.start('root', {})
+        self.candidates = []
+        self.depth = 0
+        self.skip_depth = 0
+
+        # Depths of the candidates still open, and how many top-priority ones have closed
+        self.open_candidates = []
+        self.closed_first_group = 0
+
+    def start(self, tag, attrib):
+        if self.skip_depth or tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+            return
+
+        group = self.extractor.container_group(tag, attrib.get('class'))
+        if self.depth or group is not None:
+            self.depth += 1
+            element = self.builder.start(tag, dict(attrib))
+            if group is not None:
+                self.candidates.append((group, len(self.candidates), element))
+                self.open_candidates.append((self.depth - 1, group))
+
+    def end(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+        elif self.depth:
+            self.depth -= 1
+            self.builder.end(tag)
+            while self.open_candidates and self.open_candidates[-1][0] == self.depth:
+                _, group = self.open_candidates.pop()
+                if group == 0:
+                    self.closed_first_group += 1
+
+    def has_enough(self, limit):
+        """Check if the rest of the page can't change which candidates make the limit.
+
+        Later candidates only win over earlier ones from a lower-priority group,
+        so once `limit` top-priority candidates are complete the result is final.
+        """
+        return self.closed_first_group >= limit
+
+    def data(self, data):
+        if self.depth and not self.skip_depth:
+            self.builder.data(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self.builder.end('root')
+        self.builder.close()
+
+        # Earlier groups win (e.g. <article> before class-matched <div>s), document order within a group
+        self.candidates.sort(key=lambda candidate: candidate[:2])
+        return [element for _, _, element in self.candidates]
+
+
+class ListingExtractor:
+    """Single-pass headline extraction for news listing pages"""
+
+    def __init__(self, groups, limit, title_tags=None, time_tags=None, time_classes=None):
+        """
+        groups: list of (tags, class substrings) container matchers, in priority order;
+                class substrings of None match the tag regardless of class
+        title_tags: heading tags to take the title from, or None to use the link text
+        time_tags/time_classes: element holding the publish time, if the site has one
+        """
+        self.groups = [(frozenset(tags), tuple(classes) if classes else None) for tags, classes in groups]
+        self.limit = limit
+        self.title_xpath = _HEADINGS[tuple(title_tags)] if title_tags else None
+        self.time_xpath = None
+        if time_tags:
+            self.time_xpath = etree.XPath('descendant::*[(%s) and (%s)][1]' % (
+                ' or '.join(f'self::{tag}' for tag in time_tags),
+                ' or '.join(f"contains(@class, '{cls}')" for cls in time_classes)))
+
+    def container_group(self, tag, class_attr):
+        """Get the priority of the first group matching an element, or None"""
+        for group, (tags, classes) in enumerate(self.groups):
+            if tag not in tags:
+                continue
+            if classes is None:
+                return group
+            if class_attr and any(cls in class_attr for cls in classes):
+                return group
+        return None
+
+    def extract(self, content, encoding=None):
+        """Parse page content and return up to `limit` headline entries.
+
+        Each entry is a dict with title, href, time_text, time_datetime (the
+        <time datetime> attribute) and the candidate element (for summary
+        extraction). Candidates without a link or title are skipped but still
+        count towards the limit, as before.
+        """
+        return self.extract_stream([content], encoding)
+
+    def extract_stream(self, chunks, encoding=None):
+        """Parse page content as chunks arrive and return the same entries as extract().
+
+        Stops reading (and closes `chunks`, if it is a generator) as soon as
+        later content can no longer change the result, so a download feeding
+        it can be abandoned early. Without an encoding it is sniffed from the
+        first chunk (see sniff_encoding).
+        """
+        target = _StrainedTreeTarget(self)
+        parser = None
+        try:
+            for chunk in chunks:
+                if parser is None:
+                    parser = self._parser(target, encoding or sniff_encoding(chunk))
+                parser.feed(chunk)
+                if target.has_enough(self.limit):
+                    break
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+        if parser is None:
+            parser = self._parser(target, encoding)
+        candidates = parser.close()
+
+        entries = []
+        for element in candidates[:self.limit]:
+            links = _FIRST_LINK(element)
+            if not links:
+                continue
+            link = links[0]
+
+            if self.title_xpath is None:
+                title = element_text(link, strip=True)
+            else:
+                headings = self.title_xpath(element)
+                if not headings:
+                    continue
+                title = element_text(headings[0], strip=True)
+
+            time_text = None
+            if self.time_xpath is not None:
+                time_elems = self.time_xpath(element)
+                if time_elems:
+                    time_text = element_text(time_elems[0], strip=True)
+
+            # Machine-readable <time datetime="..."> beats any displayed text
+            time_datetime = _TIME_DATETIME(element)
+
+            entries.append({
+                'title': title,
+                'href': link.get('href'),
+                'time_text': time_text,
+                'time_datetime': time_datetime[0] if time_datetime else None,
+                'element': element
+            })
+
+        return entries
+
+    def _parser(self, target, encoding):
+        return etree.HTMLParser(target=target, encoding=encoding, remove_comments=True, no_network=True)
+
+
+def element_text(element, strip=False):
+    """Get the text of an element; strip=True strips and joins each text node like BeautifulSoup"""
+    if strip:
+        return ''.join(text.strip() for text in element.itertext())
+    return ''.join(element.itertext())
+
+
+# Listing layouts used by NewsScraper
+NEWS_LISTING = ListingExtractor(
+    groups=[
+        (['article'], None),
+        (['div'], ['article', 'story', 'news', 'post', 'item']),
+        (['div'], ['headline', 'title', 'content'])
+    ],
+    limit=30,
+    title_tags=['h1', 'h2', 'h3', 'h4', 'h5'],
+    time_tags=['time', 'span'],
+    time_classes=['time', 'date', 'published']
+)
+
+OHIO_GOV_LISTING = ListingExtractor(
+    groups=[(['div', 'article'], ['news', 'press'])],
+    limit=25,
+    time_tags=['span', 'div'],
+    time_classes=['date', 'time']
+)
+
+LOCAL_GOVERNMENT_LISTING = ListingExtractor(
+    groups=[(['div', 'article'], ['news', 'announcement', 'press'])],
+    limit=10,
+    time_tags=['time', 'span'],
+    time_classes=['time', 'date', 'published']
+)
+
+WEIRD_NEWS_LISTING = ListingExtractor(
+    groups=[(['article', 'div'], ['article', 'story', 'post'])],
+    limit=15,
+    title_tags=['h1', 'h2', 'h3'],
+    time_tags=['time', 'span'],
+    time_classes=['time', 'date', 'published']
+)
+
+CRIME_NEWS_LISTING = ListingExtractor(
+    groups=[(['article', 'div'], ['article', 'story', 'crime'])],
+    limit=20,
+    title_tags=['h1', 'h2', 'h3'],
+    time_tags=['time', 'span'],
+    time_classes=['time', 'date', 'published']
+)
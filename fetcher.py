@@ -0,0 +1,211 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+import config
+import metrics
+from rate_limiter import shared_limiter
+
+
+class ConcurrentFetcher:
+    """Runs scrape jobs in parallel while keeping requests to each host serialized"""
+
+    # Statuses worth retrying after a pause
+    RETRY_STATUSES = {429, 502, 503, 504}
+
+    def __init__(self, session, cache=None, limiter=None, breaker=None, timeouts=None,
+                 max_workers=config.MAX_CONCURRENT_REQUESTS):
+        self.session = session
+        self.cache = cache
+        self.limiter = limiter or shared_limiter
+        self.breaker = breaker
+        self.timeouts = timeouts
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scraper')
+
+        # Per-host serialization
+        self._host_locks = {}
+        self._guard = threading.Lock()
+
+        # Single-flight: URL -> Future of the request currently fetching it
+        self._in_flight = {}
+
+    def get(self, url, retries=config.MAX_RETRIES, **kwargs):
+        """GET a URL, waiting for any in-flight request to the same host to finish first.
+
+        Throttled (429/5xx) and failed requests are retried up to `retries` times,
+        backing off per Retry-After or exponentially; only this host is held back.
+        Hosts the circuit breaker has given up on raise CircuitOpenError at once.
+        With adaptive timeouts, `timeout` is only used until the host has a latency
+        history; after that each retry doubles the host's deadline.
+        Concurrent GETs of the same URL share one request and its response.
+        With stream=True the body is left unread (see iter_body) and not shared;
+        the host stays locked until the response is closed, so callers must close it.
+        """
+        if kwargs.get('stream'):
+            return self._get(url, retries, **kwargs)
+
+        with self._guard:
+            flight = self._in_flight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[url] = Future()
+        if not leader:
+            return flight.result()
+
+        try:
+            response = self._get(url, retries, **kwargs)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(response)
+            return response
+        finally:
+            with self._guard:
+                del self._in_flight[url]
+
+    def _get(self, url, retries, **kwargs):
+        """GET a URL through the response cache, retrying throttled and failed requests"""
+        host = urlparse(url).netloc
+
+        # Pages still within the cache TTL never touch the network
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            response = self.cache.fresh_response(entry)
+            if response is not None:
+                metrics.record_request(response)
+                return response
+
+            conditional = self.cache.conditional_headers(entry)
+            if conditional:
+                kwargs['headers'] = {**(kwargs.get('headers') or {}), **conditional}
+
+        timeout = kwargs.get('timeout')
+        for attempt in range(retries):
+            last_attempt = attempt + 1 >= retries
+            if self.timeouts is not None:
+                kwargs['timeout'] = self.timeouts.timeout(host, timeout, attempt)
+
+            lock = self._host_lock(host)
+            lock.acquire()
+            held = False
+            try:
+                if self.breaker is not None:
+                    self.breaker.allow(host)
+                self.limiter.acquire(host)
+                try:
+                    response = self.session.get(url, **kwargs)
+                except requests.RequestException as e:
+                    if self.breaker is not None:
+                        self.breaker.record_failure(host)
+                    if last_attempt:
+                        raise
+                    print(f"Attempt {attempt + 1} failed for {url}: {e}")
+                    self.limiter.throttle(host, self.limiter.backoff_delay(attempt))
+                    continue
+
+                if self.timeouts is not None:
+                    self.timeouts.record(host, getattr(response, 'timings', None))
+                if self.breaker is not None:
+                    if response.status_code >= 500:
+                        self.breaker.record_failure(host)
+                    else:
+                        self.breaker.record_success(host)
+
+                if response.status_code in self.RETRY_STATUSES and not last_attempt:
+                    response.close()
+                    delay = self.limiter.backoff_delay(attempt, response.headers.get('Retry-After'))
+                    print(f"Rate limited on {host}, retrying in {delay:.1f}s...")
+                    self.limiter.throttle(host, delay)
+                    continue
+
+                # A streamed body is still to be read; the host stays locked until it's closed
+                if kwargs.get('stream'):
+                    self._release_on_close(response, lock)
+                    held = True
+                break
+            finally:
+                if not held:
+                    lock.release()
+
+        if self.cache is not None:
+            if kwargs.get('stream') and response.status_code == 200:
+                # Stored by iter_body, once reading the body stops
+                response.cache_pending = (url, entry)
+            else:
+                cached = self.cache.update(url, entry, response)
+                if cached is not response:
+                    response.close()  # a 304; release its connection
+                    cached.timings = getattr(response, 'timings', None)
+                response = cached
+
+        metrics.record_request(response)
+        return response
+
+    def iter_body(self, response, max_bytes=config.STREAM_MAX_BYTES, chunk_size=config.STREAM_CHUNK_SIZE):
+        """Yield a streamed response's body in chunks as they arrive, up to max_bytes.
+
+        Closing the generator early abandons the download. Whatever was read is
+        saved to the response cache: a page cut short once the parser had what it
+        needed parses to the same headlines, and keeps its ETag for revalidation.
+        Nothing is cached if reading the body fails.
+        """
+        pending = getattr(response, 'cache_pending', None)
+        chunks = []
+        received = 0
+        complete = False
+        try:
+            for chunk in self.session.iter_content(response, chunk_size):
+                received += len(chunk)
+                if pending is not None:
+                    chunks.append(chunk)
+                yield chunk
+                if received >= max_bytes:
+                    print(f"Stopped reading {response.url} at {received // 1024} KB")
+                    break
+            complete = True
+        except GeneratorExit:
+            complete = True  # the consumer had what it needed
+            raise
+        finally:
+            response.close()
+            # A download that failed part way (reset, read timeout) would be served
+            # truncated on every later 304, so only what was read on purpose is kept
+            if complete and pending is not None and chunks:
+                url, entry = pending
+                response._content = b''.join(chunks)
+                self.cache.update(url, entry, response)
+
+    def iter_completed(self, jobs):
+        """Run (func, args) jobs concurrently and yield (job index, result) as each one finishes"""
+        futures = {self.executor.submit(func, *args): index for index, (func, args) in enumerate(jobs)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    @staticmethod
+    def _release_on_close(response, lock):
+        """Release a host lock once a streamed response is closed (iter_body and 304 handling close it)"""
+        close = response.close
+        released = False
+
+        def close_and_release():
+            nonlocal released
+            try:
+                close()
+            finally:
+                if not released:
+                    released = True
+                    lock.release()
+
+        response.close = close_and_release
+
+    def _host_lock(self, host):
+        """Get the lock that serializes requests to a host"""
+        with self._guard:
+            lock = self._host_locks.get(host)
+            if lock is None:
+                lock = self._host_locks[host] = threading.Lock()
+            return lock
@@ -5,7 +5,12 @@ import json
 import os
 from datetime import datetime, timedelta
 import time
+import config
 from scrapers import NewsScraper
+from dedupe import NearDuplicateIndex
+from search_index import TopicSearchIndex
+from prefetch import PrefetchScheduler, record_category_use
+from profiling import profiled, profiler
 from chatgpt_automation import ChatGPTAutomation
 from settings_manager import SettingsManager
 
@@ -21,19 +26,20 @@ class ScriptWriterApp:
         self.scraper = NewsScraper()
         self.chatgpt = ChatGPTAutomation()
         self.current_topics = []
+        self.topic_index = NearDuplicateIndex()
+        self.search_index = TopicSearchIndex()
+        self.displayed_topics = []
         self.is_generating = False
+        self.profile_from_env = profiler.enabled
         
         # Category options
-        self.categories = [
-            "US Political News",
-            "Ohio Political News",
-            "Local Ohio News (Columbiana, Trumbull, Mahoning Counties)",
-            "Funny Stories (US National)",
-            "Local Funny Stories (Columbiana, Trumbull, Mahoning Counties)",
-            "Funny Criminal Stories (US National)",
-            "Funny Criminal Stories (Ohio Statewide)",
-            "Funny Criminal Stories (Columbiana, Mahoning, Trumbull Counties)"
-        ]
+        self.categories = config.CATEGORIES
+        
+        # Refreshes categories in the background, most-used first
+        self.prefetcher = PrefetchScheduler(
+            self.scraper,
+            self.settings_manager.get_setting('prefetch_interval', config.PREFETCH_INTERVAL),
+            usage=self._category_usage)
         
         self.setup_ui()
         self.load_settings()
@@ -141,30 +147,71 @@ class ScriptWriterApp:
             return
         
         category = self.category_var.get()
+        record_category_use(self.settings_manager, category)
+        
+        # Topics stream in per source, so start from an empty list
+        self.current_topics = []
+        self.topic_index = NearDuplicateIndex()
+        self.search_index.clear()
+        self.topics_listbox.delete(0, tk.END)
+        
+        # Show prefetched topics right away; if they are fresh there is nothing to scrape
+        stored = self.scraper.topic_store.recent(category, max(config.TIME_WINDOWS))
+        if stored:
+            self._add_topics_batch('saved topics', 0, 1, stored)
+            self._update_topics_display()
+        if self.scraper.topic_store.is_fresh(category):
+            return
+        
         self.is_generating = True
         self.generate_btn.config(state=tk.DISABLED, text="Generating...")
-        self.status_label.config(text=f"Generating topics for {category}...")
-        self.progress.start()
+        self.status_label.config(text=f"Updating topics for {category}..." if stored else f"Generating topics for {category}...")
+        self.progress.config(mode='determinate', value=0)
         
-        # Run scraping in separate thread
+        # Run scraping in separate thread; newer topics are merged into the list as they arrive
         thread = threading.Thread(target=self._scrape_topics, args=(category,))
         thread.daemon = True
         thread.start()
     
+    @profiled('generate_topics')
     def _scrape_topics(self, category):
+        # The prefetcher leaves this category alone until we're done (and wakes up then,
+        # so the new usage order applies); if it was already refreshing it, use its topics
         try:
-            self.current_topics = self.scraper.scrape_category(category)
+            if self.prefetcher.hold(category):
+                topics = self.scraper.topic_store.recent(category, max(config.TIME_WINDOWS))
+                self.root.after(0, self._add_topics_batch, 'prefetched topics', 1, 1, topics)
+            else:
+                for source, completed, total, topics in self.scraper.scrape_category_iter(category):
+                    self.root.after(0, self._add_topics_batch, source, completed, total, topics)
             self.root.after(0, self._update_topics_display)
         except Exception as e:
             self.root.after(0, lambda: self._show_error(f"Error generating topics: {str(e)}"))
         finally:
+            self.prefetcher.release(category)
             self.root.after(0, self._scraping_finished)
     
+    def _add_topics_batch(self, source, completed, total, topics):
+        """Merge one source's topics into the list as soon as they arrive"""
+        for topic in topics:
+            if self.topic_index.add(topic['title']):
+                self.current_topics.append(topic)
+                self.search_index.add(topic)
+        
+        # Keep the newest topics, up to the configured maximum
+        max_topics = self.settings_manager.get_setting('max_topics_per_search', 100)
+        self.current_topics.sort(key=lambda x: x['timestamp'], reverse=True)
+        for topic in self.current_topics[max_topics:]:
+            self.search_index.remove(topic)
+        del self.current_topics[max_topics:]
+        
+        self.filter_topics()
+        self.progress.config(value=completed * 100 / total)
+        self.status_label.config(text=f"Loaded {source} ({completed}/{total} sources), {len(self.current_topics)} topics...")
+    
+    @profiled('update_topics_display')
     def _update_topics_display(self):
-        self.topics_listbox.delete(0, tk.END)
-        for i, topic in enumerate(self.current_topics):
-            display_text = f"{topic['title']} | {topic['source']} | {topic['time_ago']} | {topic['timestamp']}"
-            self.topics_listbox.insert(tk.END, display_text)
+        self._show_topics(self.current_topics)
         
         self.status_label.config(text=f"Found {len(self.current_topics)} topics")
         
@@ -175,26 +222,28 @@ class ScriptWriterApp:
     def _scraping_finished(self):
         self.is_generating = False
         self.generate_btn.config(state=tk.NORMAL, text="Generate Topics")
-        self.progress.stop()
+        self.progress.config(mode='indeterminate', value=0)
     
     def _show_error(self, message):
         messagebox.showerror("Error", message)
         self.status_label.config(text="Error occurred")
     
+    def _show_topics(self, topics):
+        """Fill the listbox; selections map back through displayed_topics"""
+        self.displayed_topics = list(topics)
+        self.topics_listbox.delete(0, tk.END)
+        for topic in self.displayed_topics:
+            display_text = f"{topic['title']} | {topic['source']} | {topic['time_ago']} | {topic['timestamp']}"
+            self.topics_listbox.insert(tk.END, display_text)
+    
     def filter_topics(self, *args):
-        search_term = self.search_var.get().lower()
-        if not search_term:
+        search_term = self.search_var.get()
+        if not search_term.strip():
             self._update_topics_display()
             return
         
-        filtered_topics = [topic for topic in self.current_topics 
-                          if search_term in topic['title'].lower() or 
-                          search_term in topic['source'].lower()]
-        
-        self.topics_listbox.delete(0, tk.END)
-        for topic in filtered_topics:
-            display_text = f"{topic['title']} | {topic['source']} | {topic['time_ago']} | {topic['timestamp']}"
-            self.topics_listbox.insert(tk.END, display_text)
+        # Ranked prefix search over title, source and summary
+        self._show_topics(self.search_index.search(search_term))
     
     def on_topic_double_click(self, event):
         self.make_script()
@@ -205,16 +254,8 @@ class ScriptWriterApp:
             messagebox.showwarning("No Selection", "Please select a topic first.")
             return
         
-        topic_index = selection[0]
-        # Find the actual topic (accounting for filtering)
-        search_term = self.search_var.get().lower()
-        if search_term:
-            filtered_topics = [topic for topic in self.current_topics 
-                              if search_term in topic['title'].lower() or 
-                              search_term in topic['source'].lower()]
-            topic = filtered_topics[topic_index]
-        else:
-            topic = self.current_topics[topic_index]
+        # The listbox shows displayed_topics (search results when filtering)
+        topic = self.displayed_topics[selection[0]]
         
         # Generate Facebook post in separate thread
         self.make_facebook_btn.config(state=tk.DISABLED, text="Generating Post...")
@@ -230,16 +271,8 @@ class ScriptWriterApp:
             messagebox.showwarning("No Selection", "Please select a topic first.")
             return
         
-        topic_index = selection[0]
-        # Find the actual topic (accounting for filtering)
-        search_term = self.search_var.get().lower()
-        if search_term:
-            filtered_topics = [topic for topic in self.current_topics 
-                              if search_term in topic['title'].lower() or 
-                              search_term in topic['source'].lower()]
-            topic = filtered_topics[topic_index]
-        else:
-            topic = self.current_topics[topic_index]
+        # The listbox shows displayed_topics (search results when filtering)
+        topic = self.displayed_topics[selection[0]]
         
         # Generate script in separate thread
         self.make_script_btn.config(state=tk.DISABLED, text="Generating Script...")
@@ -249,6 +282,7 @@ class ScriptWriterApp:
         thread.daemon = True
         thread.start()
     
+    @profiled('generate_script')
     def _generate_script(self, topic):
         try:
             script = self.chatgpt.generate_script(topic, self.settings_manager)
@@ -258,6 +292,7 @@ class ScriptWriterApp:
         finally:
             self.root.after(0, self._script_generation_finished)
     
+    @profiled('generate_facebook_post')
     def _generate_facebook_post(self, topic):
         try:
             post = self.chatgpt.generate_facebook_post(topic, self.settings_manager)
@@ -361,7 +396,7 @@ class ScriptWriterApp:
     def open_settings(self):
         settings_window = tk.Toplevel(self.root)
         settings_window.title("Settings")
-        settings_window.geometry("500x400")
+        settings_window.geometry("500x560")
         settings_window.configure(bg='#2b2b2b')
         
         # Application settings
@@ -387,7 +422,27 @@ class ScriptWriterApp:
                 font=('Arial', 12), fg='#ffffff', bg='#2b2b2b').pack(anchor=tk.W, padx=20)
         max_topics_var = tk.StringVar(value=str(self.settings_manager.get_setting('max_topics_per_search', 100)))
         max_topics_entry = tk.Entry(settings_window, textvariable=max_topics_var, font=('Arial', 12), width=10)
-        max_topics_entry.pack(anchor=tk.W, padx=20, pady=(0, 20))
+        max_topics_entry.pack(anchor=tk.W, padx=20, pady=(0, 10))
+        
+        # Background prefetching
+        prefetch_var = tk.BooleanVar(value=self.settings_manager.get_setting('prefetch_enabled', config.PREFETCH_ENABLED))
+        prefetch_check = tk.Checkbutton(settings_window, text="Prefetch topics in the background",
+                                       variable=prefetch_var, font=('Arial', 12),
+                                       fg='#ffffff', bg='#2b2b2b', selectcolor='#3b3b3b')
+        prefetch_check.pack(anchor=tk.W, padx=20)
+        tk.Label(settings_window, text="Prefetch Every (minutes):", 
+                font=('Arial', 12), fg='#ffffff', bg='#2b2b2b').pack(anchor=tk.W, padx=20)
+        prefetch_interval = self.settings_manager.get_setting('prefetch_interval', config.PREFETCH_INTERVAL)
+        prefetch_minutes_var = tk.StringVar(value=f"{prefetch_interval / 60:g}")
+        prefetch_minutes_entry = tk.Entry(settings_window, textvariable=prefetch_minutes_var, font=('Arial', 12), width=10)
+        prefetch_minutes_entry.pack(anchor=tk.W, padx=20, pady=(0, 10))
+        
+        # Profiling, for finding out why a category is slow
+        profiling_var = tk.BooleanVar(value=self.settings_manager.get_setting('profiling_enabled', False))
+        profiling_check = tk.Checkbutton(settings_window, text=f"Profile scraping and UI actions (to {profiler.output_dir})",
+                                        variable=profiling_var, font=('Arial', 12),
+                                        fg='#ffffff', bg='#2b2b2b', selectcolor='#3b3b3b')
+        profiling_check.pack(anchor=tk.W, padx=20, pady=(0, 10))
         
         # ChatGPT info
         tk.Label(settings_window, text="ChatGPT Integration", 
@@ -413,6 +468,20 @@ The prompt will be copied to your clipboard automatically."""
                 messagebox.showerror("Error", "Max topics must be a number")
                 return
             
+            try:
+                prefetch_interval = float(prefetch_minutes_var.get()) * 60
+            except ValueError:
+                messagebox.showerror("Error", "Prefetch interval must be a number")
+                return
+            if prefetch_interval < 60:
+                messagebox.showerror("Error", "Prefetch interval must be at least 1 minute")
+                return
+            self.settings_manager.set_setting('prefetch_interval', prefetch_interval)
+            self.settings_manager.set_setting('prefetch_enabled', prefetch_var.get())
+            self._apply_prefetch_settings()
+            self.settings_manager.set_setting('profiling_enabled', profiling_var.get())
+            self._apply_profiling_settings()
+            
             messagebox.showinfo("Saved", "Settings saved successfully!")
             settings_window.destroy()
         
@@ -423,7 +492,30 @@ The prompt will be copied to your clipboard automatically."""
     
     def load_settings(self):
         # Load any saved settings
-        pass
+        last_category = self.settings_manager.get_setting('last_category')
+        if last_category in self.categories:
+            self.category_var.set(last_category)
+        
+        self._apply_prefetch_settings()
+        self._apply_profiling_settings()
+    
+    def _apply_profiling_settings(self):
+        """Profile if enabled in Settings or by $SCRIPTWRITER_PROFILE"""
+        profiler.enabled = self.profile_from_env or self.settings_manager.get_setting('profiling_enabled', False)
+    
+    def _apply_prefetch_settings(self):
+        """Start or stop background prefetching to match the settings"""
+        self.prefetcher.interval = self.settings_manager.get_setting('prefetch_interval', config.PREFETCH_INTERVAL)
+        if self.settings_manager.get_setting('prefetch_enabled', config.PREFETCH_ENABLED):
+            self.prefetcher.start()
+            self.prefetcher.wake()
+        else:
+            self.prefetcher.stop()
+    
+    def _category_usage(self):
+        """Usage history and last category, for the prefetcher's priority order"""
+        return (self.settings_manager.get_setting('category_usage', {}) or {},
+                self.settings_manager.get_setting('last_category'))
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,262 @@
+import contextlib
+import json
+import threading
+import time
+from datetime import datetime
+
+from state_file import write_atomic
+
+# The source being scraped on this thread, so fetch and parse code can report
+# into it without being handed a metrics object
+_current = threading.local()
+
+# Per-request timings summed for each source, as reported by transport.SessionPool
+TIMING_PHASES = ('dns', 'connect', 'tls', 'ttfb', 'total')
+
+
+class SourceStats:
+    """Totals for one source across every scrape of it"""
+
+    def __init__(self, source):
+        self.source = source
+        self.scrapes = 0
+        self.errors = 0
+        self.requests = 0
+        self.cache_hits = 0
+        self.statuses = {}
+        self.seconds = dict.fromkeys(TIMING_PHASES + ('parse', 'scrape'), 0.0)
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.topics = 0
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'scrapes': self.scrapes,
+            'errors': self.errors,
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'seconds': {phase: round(seconds, 4) for phase, seconds in self.seconds.items()},
+            'wire_bytes': self.wire_bytes,
+            'body_bytes': self.body_bytes,
+            'topics': self.topics,
+            # Cost per topic, to find sources that take the most time for the least yield
+            'seconds_per_topic': round(self.seconds['scrape'] / self.topics, 4) if self.topics else None
+        }
+
+
+class _SourceRun:
+    """One scrape of a source in progress; folded into its SourceStats when it ends"""
+
+    def __init__(self):
+        self.responses = []
+        self.parse_seconds = 0.0
+        self.errors = 0
+
+
+class ScrapeMetrics:
+    """Per-source and per-category scrape measurements, exportable as JSON or Prometheus text.
+
+    NewsScraper wraps each source job in source(), which makes the job's
+    requests (record_request) and parse time (parsing) count towards it.
+    Pass the fetcher's ResponseCache to include its counters in reports.
+    """
+
+    def __init__(self, cache=None):
+        self.started = datetime.now()
+        self.cache = cache
+        self.sources = {}
+        self.categories = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def source(self, source):
+        """Attribute the requests and parsing on this thread to a source while the block runs"""
+        run = _SourceRun()
+        previous = getattr(_current, 'run', None)
+        _current.run = run
+        start = time.perf_counter()
+        result = {'topics': 0}
+        failed = False
+        try:
+            yield result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _current.run = previous
+            self._finish(source, run, time.perf_counter() - start, result['topics'], failed)
+
+    def record_category(self, category, source, fetched, in_window, matched):
+        """Record how many of a source's topics a category kept after the time and content filters"""
+        with self._lock:
+            counts = self._category(category)['sources'].setdefault(
+                source, {'fetched': 0, 'in_window': 0, 'matched': 0})
+            counts['fetched'] += fetched
+            counts['in_window'] += in_window
+            counts['matched'] += matched
+
+    def record_kept(self, category, topics):
+        """Record which topic sources survived deduplication in a category's latest topic list"""
+        kept = {}
+        for topic in topics:
+            kept[topic['source']] = kept.get(topic['source'], 0) + 1
+        with self._lock:
+            self._category(category)['kept'] = kept
+
+    def report(self):
+        """Get everything recorded so far as a JSON-serializable dict"""
+        with self._lock:
+            sources = sorted((stats.to_dict() for stats in self.sources.values()),
+                             key=lambda stats: stats['seconds']['scrape'], reverse=True)
+            categories = json.loads(json.dumps(self.categories))
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'sources': sources,
+            'categories': categories,
+            'response_cache': self.cache.stats() if self.cache is not None else None
+        }
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.report(), indent=2))
+
+    def prometheus_text(self):
+        """Render the totals in the Prometheus text exposition format (for the node_exporter textfile collector)"""
+        report = self.report()
+        lines = []
+
+        def metric(name, help_text, metric_type, samples):
+            lines.append(f"# HELP scriptwriter_{name} {help_text}")
+            lines.append(f"# TYPE scriptwriter_{name} {metric_type}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+                lines.append(f"scriptwriter_{name}{{{label_text}}} {value}" if label_text else f"scriptwriter_{name} {value}")
+
+        sources = report['sources']
+        metric('source_scrapes_total', "Times each source was scraped", 'counter',
+               [({'source': s['source']}, s['scrapes']) for s in sources])
+        metric('source_errors_total', "Scrapes of each source that raised", 'counter',
+               [({'source': s['source']}, s['errors']) for s in sources])
+        metric('source_requests_total', "Responses per source and HTTP status, cached ones included", 'counter',
+               [({'source': s['source'], 'status': status}, count)
+                for s in sources for status, count in s['statuses'].items()])
+        metric('source_cache_hits_total', "Responses served without a network request (response cache or cassette)", 'counter',
+               [({'source': s['source']}, s['cache_hits']) for s in sources])
+        metric('source_seconds_total', "Seconds spent per source, by phase", 'counter',
+               [({'source': s['source'], 'phase': phase}, seconds)
+                for s in sources for phase, seconds in s['seconds'].items()])
+        metric('source_bytes_total', "Bytes received per source, on the wire and decompressed", 'counter',
+               [({'source': s['source'], 'kind': kind}, s[f'{kind}_bytes']) for s in sources for kind in ('wire', 'body')])
+        metric('source_topics_total', "Topics parsed from each source", 'counter',
+               [({'source': s['source']}, s['topics']) for s in sources])
+        metric('category_source_topics_total', "Topics a category got from each source, by filter stage", 'counter',
+               [({'category': category, 'source': source, 'stage': stage}, count)
+                for category, data in report['categories'].items()
+                for source, counts in data['sources'].items() for stage, count in counts.items()])
+        metric('category_kept_topics', "Topics per topic source in a category's latest list, after deduplication", 'gauge',
+               [({'category': category, 'source': source}, count)
+                for category, data in report['categories'].items() for source, count in data['kept'].items()])
+        cache = report['response_cache']
+        if cache is not None:
+            metric('response_cache_lookups_total', "Response cache lookups, by result", 'counter',
+                   [({'result': result}, cache[key]) for result, key in
+                    (('hit', 'hits'), ('revalidated', 'revalidated'), ('miss', 'misses'))])
+            metric('response_cache_bytes_saved_total', "Body bytes served from the response cache instead of downloaded",
+                   'counter', [({}, cache['bytes_saved'])])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        # Atomic, so the textfile collector never reads a half-written file
+        write_atomic(path, self.prometheus_text())
+
+    def _finish(self, source, run, seconds, topics, failed):
+        with self._lock:
+            stats = self.sources.get(source)
+            if stats is None:
+                stats = self.sources[source] = SourceStats(source)
+            stats.scrapes += 1
+            stats.errors += run.errors + failed
+            stats.topics += topics
+            stats.seconds['scrape'] += seconds
+            stats.seconds['parse'] += run.parse_seconds
+
+            # Streamed bodies finish inside the job, so their timings are complete by now
+            for status, timings in run.responses:
+                stats.requests += 1
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+                if timings is None:
+                    stats.cache_hits += 1
+                    continue
+                for phase in TIMING_PHASES:
+                    stats.seconds[phase] += timings[phase]
+                stats.wire_bytes += timings['wire_bytes']
+                stats.body_bytes += timings['body_bytes']
+
+    def _category(self, category):
+        return self.categories.setdefault(category, {'sources': {}, 'kept': {}})
+
+
+def record_request(response):
+    """Count a response towards the source being scraped on this thread, if any"""
+    run = getattr(_current, 'run', None)
+    if run is not None:
+        # Responses from the cache (or a replayed cassette) carry no timings
+        run.responses.append((response.status_code, getattr(response, 'timings', None)))
+
+
+def record_error():
+    """Count a failure the scraper handled itself towards the source being scraped on this thread"""
+    run = getattr(_current, 'run', None)
+    if run is not None:
+        run.errors += 1
+
+
+def record_parse(seconds):
+    run = getattr(_current, 'run', None)
+    if run is not None:
+        run.parse_seconds += seconds
+
+
+@contextlib.contextmanager
+def parsing():
+    """Count the time spent in the block as parsing for the source being scraped on this thread"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_parse(time.perf_counter() - start)
+
+
+def parse_stream(parse, chunks):
+    """Return parse(chunks), counting its time as parsing less the time spent waiting for chunks"""
+    waited = 0.0
+
+    def timed_chunks():
+        nonlocal waited
+        iterator = iter(chunks)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    waited += time.perf_counter() - start
+                yield chunk
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    start = time.perf_counter()
+    try:
+        return parse(timed_chunks())
+    finally:
+        record_parse(time.perf_counter() - start - waited)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Background topic prefetching for ScriptWriter
+Keeps every category's topics fresh in the topic store so "Generate Topics"
+can show them immediately. Runs inside the app, or on its own:
+
+    python prefetch.py                  # refresh categories every PREFETCH_INTERVAL seconds
+    python prefetch.py --once           # refresh stale categories once and exit
+    python prefetch.py --metrics-prom /var/lib/node_exporter/scriptwriter.prom
+"""
+
+import argparse
+import threading
+import time
+
+import config
+
+
+def category_priority(categories, usage, last_category=None):
+    """Order categories for refreshing: the last one used, then most recently and most often used.
+
+    usage maps category -> {'count': uses, 'last_used': unix time}; categories
+    never used keep their dropdown order at the end.
+    """
+    def key(item):
+        position, category = item
+        stats = usage.get(category) or {}
+        return (category != last_category, -stats.get('last_used', 0), -stats.get('count', 0), position)
+
+    return [category for _, category in sorted(enumerate(categories), key=key)]
+
+
+def record_category_use(settings_manager, category):
+    """Remember a category as the last one used and count it towards its prefetch priority"""
+    usage = dict(settings_manager.get_setting('category_usage', {}) or {})
+    stats = usage.get(category) or {}
+    usage[category] = {'count': stats.get('count', 0) + 1, 'last_used': time.time()}
+
+    settings_manager.settings['category_usage'] = usage
+    settings_manager.set_setting('last_category', category)
+
+
+class PrefetchScheduler:
+    """Daemon thread that refreshes stale categories, most-used first"""
+
+    def __init__(self, scraper, interval=config.PREFETCH_INTERVAL, usage=None, categories=None, on_refresh=None):
+        """
+        scraper: NewsScraper whose topic store is kept fresh
+        interval: seconds after which a category is refreshed again
+        usage: callable returning (usage dict, last category) for prioritizing, see category_priority
+        on_refresh: callable given the categories refreshed, after each pass that refreshed any
+        """
+        self.scraper = scraper
+        self.interval = interval
+        self.usage = usage or (lambda: ({}, None))
+        self.categories = categories or config.CATEGORIES
+        self.on_refresh = on_refresh
+        self.refreshing = None
+        self._held = set()  # categories being scraped by someone else, e.g. Generate Topics
+        self._refresh_done = threading.Condition()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop after the refresh in progress (if any) finishes"""
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """Re-check the categories now, e.g. after the usage order changed"""
+        self._wake.set()
+
+    def hold(self, category):
+        """Keep passes off a category the caller is about to scrape itself; undo with release().
+
+        If a pass is already refreshing the category this waits for it and
+        returns True: the topic store then has its fresh topics, and scraping
+        it again would only fetch every page twice.
+        """
+        with self._refresh_done:
+            self._held.add(category)
+            waited = False
+            while self.refreshing and category in self.refreshing:
+                self._refresh_done.wait()
+                waited = True
+            return waited
+
+    def release(self, category):
+        """Let passes refresh a held category again, and re-check the categories now"""
+        with self._refresh_done:
+            self._held.discard(category)
+        self.wake()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def run_once(self):
+        """Refresh every stale category in priority order; returns the categories refreshed"""
+        usage, last_category = self.usage()
+        with self._refresh_done:
+            stale = [category for category in category_priority(self.categories, usage, last_category)
+                     if category not in self._held
+                     and not self.scraper.topic_store.is_fresh(category, self.interval)]
+            if not stale or self._stop.is_set():
+                return []
+            # One fetch plan for all of them, so sources shared between categories are fetched once
+            self.refreshing = stale
+        start = time.perf_counter()
+        try:
+            counts = self.scraper.refresh_categories(stale)
+        except Exception as e:
+            print(f"Error prefetching {', '.join(stale)}: {e}")
+            return []
+        finally:
+            with self._refresh_done:
+                self.refreshing = None
+                self._refresh_done.notify_all()
+
+        for category, count in counts.items():
+            print(f"Prefetched {count} topics for {category}")
+        print(f"Prefetched {len(stale)} categories in {time.perf_counter() - start:.1f}s")
+        if self.on_refresh is not None:
+            self.on_refresh(stale)
+        return stale
+
+    def _run(self):
+        # Check often enough that a category is refreshed soon after it goes stale
+        check_interval = max(5, min(config.PREFETCH_CHECK_INTERVAL, self.interval / 4))
+        while not self._stop.is_set():
+            self.run_once()
+            self._wake.wait(check_interval)
+            self._wake.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep ScriptWriter topics prefetched")
+    parser.add_argument('--interval', type=float, default=config.PREFETCH_INTERVAL,
+                        help="seconds between refreshes of a category (default: %(default)s)")
+    parser.add_argument('--once', action='store_true', help="refresh stale categories once and exit")
+    parser.add_argument('--metrics-json', help="rewrite per-source scrape metrics to this JSON file after each pass")
+    parser.add_argument('--metrics-prom', help="rewrite the metrics as a Prometheus textfile after each pass")
+    args = parser.parse_args(argv)
+
+    from scrapers import NewsScraper
+    from settings_manager import SettingsManager
+
+    def usage():
+        # Re-read each pass so the app's latest usage reorders the daemon too
+        settings_manager = SettingsManager()
+        return (settings_manager.get_setting('category_usage', {}) or {},
+                settings_manager.get_setting('last_category'))
+
+    scraper = NewsScraper()
+
+    def write_metrics(categories):
+        if args.metrics_json:
+            scraper.metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            scraper.metrics.write_prometheus(args.metrics_prom)
+
+    scheduler = PrefetchScheduler(scraper, args.interval, usage, on_refresh=write_metrics)
+    if args.once:
+        scheduler.run_once()
+        return 0
+
+    print(f"Prefetching {len(scheduler.categories)} categories every {args.interval:.0f}s (Ctrl+C to stop)")
+    scheduler.start()
+    try:
+        while scheduler.is_running():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,210 @@
+import contextlib
+import cProfile
+import functools
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import config
+
+# Environment switches, so a slow category can be profiled without code changes:
+#   SCRIPTWRITER_PROFILE=1 python main.py
+PROFILE_ENV = 'SCRIPTWRITER_PROFILE'
+PROFILE_DIR_ENV = 'SCRIPTWRITER_PROFILE_DIR'
+
+# The run this thread's work is profiled into
+_current = threading.local()
+
+
+class ProfileRun:
+    """One profiled action: a cProfile per thread that joined it, and tracemalloc snapshots"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = datetime.now()
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        self.profiles = []
+        self.hooks = {}  # hook name -> [calls, seconds], from every thread in the run
+        self.snapshot = None
+        self.peak_bytes = 0
+        self._lock = threading.Lock()
+
+    def record_hook(self, name, seconds):
+        with self._lock:
+            counts = self.hooks.setdefault(name, [0, 0.0])
+            counts[0] += 1
+            counts[1] += seconds
+
+    def stats(self):
+        """The cProfile stats of every thread in the run, merged"""
+        with self._lock:
+            profiles = [profile for profile in self.profiles if profile.getstats()]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+class Profiler:
+    """Opt-in cProfile and tracemalloc capture of scraping, parsing and UI actions.
+
+    Functions decorated with profiled() start a run when called outside one;
+    calls inside a run (on any thread that joined it) are counted in the run's
+    hook table and show up in its profile. Each run is written to output_dir as
+    a .pstats file and a text report of the top memory allocations.
+    """
+
+    def __init__(self, enabled=False, output_dir=config.PROFILE_DIR, top=config.PROFILE_TOP_ALLOCATIONS):
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.top = top
+        self._tracing = 0  # runs in progress; tracemalloc is process-wide
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def profile(self, name, standalone=True):
+        """Profile the block as a run, or as part of the run this thread is in.
+
+        standalone=False only measures the block inside a run, for hot helpers
+        that would otherwise write a run per call.
+        """
+        run = getattr(_current, 'run', None)
+        if not self.enabled or (run is None and not standalone):
+            yield
+            return
+
+        if run is not None:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                run.record_hook(name, time.perf_counter() - start)
+            return
+
+        run = ProfileRun(name)
+        self._start_tracing(run)
+        try:
+            with self.joined(run):
+                yield
+        finally:
+            run.seconds = time.perf_counter() - run.start
+            self._stop_tracing(run)
+            self.dump(run)
+
+    @contextlib.contextmanager
+    def joined(self, run):
+        """Profile this thread into a run started on another thread (no-op for None)"""
+        if run is None or getattr(_current, 'run', None) is not None:
+            yield
+            return
+
+        profile = cProfile.Profile()
+        _current.run = run
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler at a time; the run goes without this thread
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with run._lock:
+                    run.profiles.append(profile)
+            _current.run = None
+
+    def current(self):
+        """The run this thread is profiling into, to hand to worker threads via joined()"""
+        return getattr(_current, 'run', None) if self.enabled else None
+
+    def dump(self, run):
+        """Write a run's .pstats file and memory report; returns the path prefix"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', run.name).strip('-')
+        prefix = os.path.join(self.output_dir, f"{run.started:%Y%m%d-%H%M%S-%f}-{slug}")
+
+        stats = run.stats()
+        if stats is not None:
+            stats.dump_stats(f"{prefix}.pstats")
+        with open(f"{prefix}.txt", 'w', encoding='utf-8') as f:
+            f.write(self.report(run))
+        print(f"Profiled {run.name} in {run.seconds:.2f}s: {prefix}.pstats")
+        return prefix
+
+    def report(self, run):
+        """Text report of a run: timing, hook calls and the top allocations still held at its end"""
+        lines = [f"{run.name}: {run.seconds:.3f}s wall, started {run.started:%Y-%m-%d %H:%M:%S}",
+                 f"Peak traced memory: {run.peak_bytes / 1024:.1f} KB"]
+
+        if run.hooks:
+            lines += ['', 'Hooks (calls, seconds):']
+            for name, (calls, seconds) in sorted(run.hooks.items(), key=lambda item: -item[1][1]):
+                lines.append(f"  {name:<30} {calls:>7} {seconds:>10.4f}")
+
+        if run.snapshot is not None:
+            lines += ['', f"Top {self.top} allocations by size (new since the run started):"]
+            for stat in run.snapshot[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size_diff / 1024:>10.1f} KB {stat.count_diff:>+8} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+        return '\n'.join(lines) + '\n'
+
+    def _start_tracing(self, run):
+        with self._lock:
+            if self._tracing == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(config.PROFILE_TRACEBACK_FRAMES)
+                self._started_tracemalloc = True
+            self._tracing += 1
+            # Peaks are process-wide, so overlapping runs share them
+            tracemalloc.reset_peak()
+        run.snapshot = self._snapshot()
+
+    def _stop_tracing(self, run):
+        before = run.snapshot
+        run.snapshot = self._snapshot().compare_to(before, 'lineno')
+        with self._lock:
+            run.peak_bytes = tracemalloc.get_traced_memory()[1]
+            self._tracing -= 1
+            if self._tracing == 0 and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
+
+
+def profiler_from_env():
+    """Build a Profiler, enabled when $SCRIPTWRITER_PROFILE is set (writing to $SCRIPTWRITER_PROFILE_DIR)"""
+    enabled = os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'yes')
+    return Profiler(enabled, os.environ.get(PROFILE_DIR_ENV) or config.PROFILE_DIR)
+
+
+# Shared by every hook, so the app's Settings checkbox switches them all
+profiler = profiler_from_env()
+
+
+def profiled(name=None, standalone=True):
+    """Decorator running a function under profiler.profile() (see Profiler.profile for standalone)"""
+    def decorate(func):
+        label = name or func.__name__.strip('_')
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.profile(label, standalone):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
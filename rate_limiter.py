@@ -0,0 +1,96 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import config
+
+
+class TokenBucket:
+    """Token bucket that refills at a fixed rate and can be blocked for a while"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+
+    def reserve(self):
+        """Take a token and return how many seconds the caller must wait before using it"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # Tokens may go negative: later callers queue up behind earlier ones
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        return max(wait, self.blocked_until - now)
+
+    def block(self, seconds):
+        """Hold back every request to this bucket for the given number of seconds"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """Per-host token buckets, shared by every scraper in the process"""
+
+    def __init__(self, request_delay=config.REQUEST_DELAY, burst=config.RATE_LIMIT_BURST,
+                 host_delays=config.HOST_REQUEST_DELAYS):
+        self.request_delay = request_delay
+        self.burst = burst
+        self.host_delays = host_delays
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host):
+        """Wait until a request to host is allowed"""
+        with self._lock:
+            wait = self._bucket(host).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttle(self, host, seconds):
+        """Pause requests to host (other hosts are unaffected)"""
+        with self._lock:
+            self._bucket(host).block(seconds)
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number attempt, honoring a Retry-After header"""
+        delay = self._parse_retry_after(retry_after)
+        if delay is None:
+            # Exponential backoff with jitter so parallel scrapers don't retry in lockstep
+            delay = config.RETRY_BACKOFF_BASE * (2 ** attempt)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        return min(delay, config.RETRY_BACKOFF_MAX)
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            delay = self.host_delays.get(host, self.request_delay)
+            rate = 1 / delay if delay > 0 else float('inf')
+            bucket = self._buckets[host] = TokenBucket(rate, self.burst)
+        return bucket
+
+    def _parse_retry_after(self, value):
+        """Parse a Retry-After header given in seconds or as an HTTP date"""
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+# One limiter for the whole process so parallel categories share each host's budget
+shared_limiter = RateLimiter()
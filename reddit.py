@@ -0,0 +1,131 @@
+from urllib.parse import quote, urlencode
+
+import config
+import metrics
+
+
+class RedditClient:
+    """Fetches combined subreddit listings, paging back to a time cutoff or forward from the last post seen"""
+
+    BASE_URL = 'https://www.reddit.com'
+
+    # Post fields the scrapers use; the rest of each payload is dropped
+    FIELDS = ('name', 'subreddit', 'title', 'score', 'created_utc', 'permalink',
+              'selftext', 'url', 'stickied', 'is_ads', 'removed_by_category')
+
+    # Fullnames the /by_id endpoint accepts per request
+    BY_ID_LIMIT = 100
+
+    def __init__(self, fetcher, sort=config.REDDIT_SORT, limit=config.REDDIT_LIMIT,
+                 max_pages=config.REDDIT_MAX_PAGES):
+        self.fetcher = fetcher
+        self.sort = sort
+        self.limit = limit
+        self.max_pages = max_pages
+
+    def listing_url(self, subreddits, after=None, before=None, sort=None):
+        """Get the URL of one page of the combined listing, e.g. /r/politics+Conservative/hot.json"""
+        params = {'limit': self.limit}
+        if after:
+            params['after'] = after
+        if before:
+            params['before'] = before
+        path = quote('+'.join(subreddits), safe='+')
+        return f"{self.BASE_URL}/r/{path}/{sort or self.sort}.json?{urlencode(params)}"
+
+    def posts(self, subreddits, cutoff=None, headers=None):
+        """Get the posts of several subreddits from one combined listing.
+
+        Pages are requested until one holds nothing newer than `cutoff` (unix
+        time), the listing ends or max_pages is reached. Each payload is decoded
+        once and only FIELDS are kept; posts repeated across pages appear once.
+        """
+        posts = []
+        seen = set()
+        after = None
+
+        for _ in range(self.max_pages):
+            url = self.listing_url(subreddits, after)
+            response = self.fetcher.get(url, timeout=15, headers=headers)
+            if response.status_code != 200:
+                print(f"All requests failed for {url}")
+                break
+
+            listing, page = self._read_page(response, posts, seen)
+            after = listing.get('after')
+            if not page or not after or self._past_cutoff(page, cutoff):
+                break
+
+        return posts
+
+    def new_posts(self, subreddits, before, headers=None):
+        """Get the posts newer than the `before` fullname from the combined 'new' listing.
+
+        Pages are followed towards newer posts until one comes back short or
+        max_pages is reached, so a quiet listing costs a single request.
+        """
+        posts = []
+        seen = set()
+
+        for _ in range(self.max_pages):
+            url = self.listing_url(subreddits, before=before, sort='new')
+            response = self.fetcher.get(url, timeout=15, headers=headers)
+            if response.status_code != 200:
+                print(f"All requests failed for {url}")
+                break
+
+            listing, page = self._read_page(response, posts, seen)
+            if len(page) < self.limit:
+                break
+            # Pages run newest first, so the next page is newer than this one's first post
+            before = listing.get('before') or page[0].get('name')
+
+        return posts
+
+    def posts_by_id(self, fullnames, headers=None):
+        """Get current data (e.g. scores) for posts by fullname, BY_ID_LIMIT per request"""
+        posts = []
+        seen = set()
+
+        for start in range(0, len(fullnames), self.BY_ID_LIMIT):
+            names = ','.join(fullnames[start:start + self.BY_ID_LIMIT])
+            url = f"{self.BASE_URL}/by_id/{names}.json"
+            response = self.fetcher.get(url, timeout=15, headers=headers)
+            if response.status_code != 200:
+                print(f"All requests failed for {url}")
+                continue
+
+            self._read_page(response, posts, seen)
+
+        return posts
+
+    def is_listed(self, fullname, headers=None):
+        """Check that a post still exists and wasn't removed, so it can anchor a `before` page"""
+        posts = self.posts_by_id([fullname], headers=headers)
+        return any(post['name'] == fullname and not post['removed_by_category'] for post in posts)
+
+    def _read_page(self, response, posts, seen):
+        """Decode a listing page once, adding its unseen posts (FIELDS only) to posts.
+
+        Returns the listing data and the page's raw posts.
+        """
+        with metrics.parsing():
+            listing = response.json().get('data') or {}
+            page = [post.get('data') or {} for post in listing.get('children') or []]
+            for post_data in page:
+                name = post_data.get('name')
+                if name in seen:
+                    continue
+                seen.add(name)
+                posts.append({field: post_data.get(field) for field in self.FIELDS})
+        return listing, page
+
+    def _past_cutoff(self, page, cutoff):
+        """Check if later pages can only hold posts older than the cutoff"""
+        if cutoff is None:
+            return False
+        created = [post.get('created_utc') or 0 for post in page]
+        # 'new' is ordered by time; other sorts can still surface a recent post later on
+        if self.sort == 'new':
+            return min(created) < cutoff
+        return max(created) < cutoff
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import config
+from state_file import write_atomic
+
+
+class ResponseCache:
+    """On-disk HTTP response cache with ETag/Last-Modified revalidation"""
+
+    # Headers that describe the wire format rather than the (decoded) body we store
+    SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+    def __init__(self, cache_dir=config.HTTP_CACHE_DIR, ttl=config.HTTP_CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Counters
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+        self.prune(config.HTTP_CACHE_MAX_AGE)
+
+    def lookup(self, url):
+        """Get the cached entry for a URL, or None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+
+        if meta.get('url') != url:
+            return None
+
+        return meta, body
+
+    def fresh_response(self, entry):
+        """Build a response from an entry that is still within its TTL, or None"""
+        if entry is None:
+            return None
+
+        meta, body = entry
+        if time.time() - meta['stored_at'] > self.ttl:
+            return None
+
+        self._count('hits', len(body))
+        return self._build_response(meta, body)
+
+    def conditional_headers(self, entry):
+        """Get If-None-Match/If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry is None:
+            return headers
+
+        meta = entry[0]
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def update(self, url, entry, response):
+        """Store a fresh response or serve the cached body for a 304; returns the response to use"""
+        if response.status_code == 304 and entry is not None:
+            meta, body = entry
+            meta['stored_at'] = time.time()
+            for header, key in (('ETag', 'etag'), ('Last-Modified', 'last_modified')):
+                if response.headers.get(header):
+                    meta[key] = response.headers[header]
+            self._write(url, meta, body)
+
+            self._count('revalidated', len(body))
+            return self._build_response(meta, body)
+
+        self._count('misses', 0)
+        if response.status_code == 200:
+            meta = {
+                'url': url,
+                'status': response.status_code,
+                'headers': {k: v for k, v in response.headers.items() if k.lower() not in self.SKIP_HEADERS},
+                'encoding': response.encoding,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'stored_at': time.time()
+            }
+            self._write(url, meta, response.content)
+
+        return response
+
+    def stats(self):
+        """Get hit/miss/byte-savings counters"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'bytes_saved': self.bytes_saved
+            }
+
+    def prune(self, max_age):
+        """Delete entries that have not been refreshed within max_age seconds"""
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                continue
+
+    def _count(self, counter, saved):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.bytes_saved += saved
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+
+    def _write(self, url, meta, body):
+        """Write an entry atomically so readers never see a half-written file"""
+        meta_path, body_path = self._paths(url)
+        try:
+            write_atomic(body_path, body)
+            write_atomic(meta_path, json.dumps(meta))
+        except OSError as e:
+            print(f"Error writing cache entry for {url}: {e}")
+
+    def _build_response(self, meta, body):
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.url = meta['url']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = meta.get('encoding')
+        response._content = body
+        response.from_cache = True
+        return response
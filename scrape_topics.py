@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Headless topic scraping for ScriptWriter
+Scrapes categories without the UI (e.g. from cron or Task Scheduler) and
+writes the topics as JSON lines or CSV.
+
+    python scrape_topics.py                                 # all categories, JSONL to stdout
+    python scrape_topics.py -c political -c crime -o topics.csv
+    python scrape_topics.py --list
+    python scrape_topics.py --metrics-json logs/metrics.json --metrics-prom logs/scriptwriter.prom
+    python scrape_topics.py --profile -c crime              # cProfile + memory report in logs/profiles
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+import config
+from profiling import profiled, profiler
+from scrapers import NewsScraper
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1  # at least one category raised an error
+EXIT_USAGE = 2   # bad arguments or no category matched
+EXIT_EMPTY = 3   # every category ran, but at least one found no topics
+
+FIELDS = ['category', 'title', 'source', 'url', 'timestamp', 'summary', 'score']
+
+
+class TopicWriter:
+    """Writes topics as JSON lines or CSV rows, one category batch at a time"""
+
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        self._lock = threading.Lock()
+        self._csv = None
+        if output_format == 'csv':
+            self._csv = csv.DictWriter(stream, fieldnames=FIELDS, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, category, topics):
+        rows = [self._row(category, topic) for topic in topics]
+        with self._lock:
+            if self._csv is not None:
+                self._csv.writerows(rows)
+            else:
+                for row in rows:
+                    self.stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+            self.stream.flush()
+
+    def _row(self, category, topic):
+        return {
+            'category': category,
+            'title': topic['title'],
+            'source': topic['source'],
+            'url': topic['url'],
+            'timestamp': topic['timestamp'].isoformat(timespec='seconds'),
+            'summary': topic['summary'],
+            'score': topic.get('score')
+        }
+
+
+def select_categories(patterns):
+    """Get the categories containing any of the given texts (all of them if none are given)"""
+    if not patterns:
+        return list(config.CATEGORIES)
+    return [category for category in config.CATEGORIES
+            if any(pattern.lower() in category.lower() for pattern in patterns)]
+
+
+@profiled('scrape_topics')
+def scrape_categories(scraper, categories, writer):
+    """Scrape categories together, writing each as it finishes; returns the exit code"""
+    exit_code = EXIT_OK
+    start = time.perf_counter()
+    remaining = list(categories)
+
+    # One fetch plan covers every category, so shared sources are fetched once
+    try:
+        for category, topics in scraper.scrape_categories_iter(categories):
+            remaining.remove(category)
+            writer.write(category, topics)
+            elapsed = time.perf_counter() - start
+            print(f"{'✓' if topics else '✗'} {category}: {len(topics)} topics in {elapsed:.2f}s", file=sys.stderr)
+            if not topics and exit_code == EXIT_OK:
+                exit_code = EXIT_EMPTY
+    except Exception as e:
+        for category in remaining:
+            print(f"✗ {category}: {e}", file=sys.stderr)
+        exit_code = EXIT_FAILED
+
+    print(f"Finished {len(categories)} categories in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return exit_code
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scrape ScriptWriter topic categories without the UI",
+        epilog=f"Exit codes: {EXIT_OK} success, {EXIT_FAILED} a category failed, "
+               f"{EXIT_USAGE} bad arguments, {EXIT_EMPTY} a category found no topics")
+    parser.add_argument('-c', '--category', action='append',
+                        help="scrape categories containing this text (repeatable; default: all)")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('-f', '--format', choices=['jsonl', 'csv'],
+                        help="output format (default: from the output file extension, else jsonl)")
+    parser.add_argument('--metrics-json', help="write per-source scrape metrics to this JSON file")
+    parser.add_argument('--metrics-prom', help="write the metrics as a Prometheus textfile (e.g. for node_exporter)")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"write a cProfile .pstats file and memory report to {config.PROFILE_DIR}")
+    parser.add_argument('-q', '--quiet', action='store_true', help="hide scraper progress messages")
+    parser.add_argument('--list', action='store_true', help="list the categories and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.list:
+        for category in config.CATEGORIES:
+            print(category)
+        return EXIT_OK
+
+    categories = select_categories(args.category)
+    if not categories:
+        print(f"No category matches {', '.join(args.category)}; use --list to see them", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.profile:
+        profiler.enabled = True
+
+    output_format = args.format
+    if output_format is None:
+        output_format = 'csv' if args.output.lower().endswith('.csv') else 'jsonl'
+
+    with contextlib.ExitStack() as stack:
+        if args.output == '-':
+            stream = sys.stdout
+        else:
+            stream = stack.enter_context(open(args.output, 'w', encoding='utf-8', newline=''))
+
+        # Scraper progress goes to stderr so stdout only carries topics
+        progress = stack.enter_context(open(os.devnull, 'w')) if args.quiet else sys.stderr
+        stack.enter_context(contextlib.redirect_stdout(progress))
+
+        writer = TopicWriter(stream, output_format)
+        scraper = NewsScraper()
+        exit_code = scrape_categories(scraper, categories, writer)
+
+        if args.metrics_json:
+            scraper.metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            scraper.metrics.write_prometheus(args.metrics_prom)
+        return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
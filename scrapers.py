@@ -1,28 +1,87 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
 from datetime import datetime, timedelta
 import re
 from urllib.parse import urljoin, urlparse
 import random
+import time
+
+import config
+import metrics
+from adaptive_timeout import AdaptiveTimeouts
+from cassette import cassette_adapter_from_env
+from circuit_breaker import CircuitBreaker
+from content_classifier import ContentClassifier
+from dedupe import NearDuplicateIndex
+from extraction import (NEWS_LISTING, OHIO_GOV_LISTING, LOCAL_GOVERNMENT_LISTING,
+                        WEIRD_NEWS_LISTING, CRIME_NEWS_LISTING, element_text)
+from fetcher import ConcurrentFetcher
+from metrics import ScrapeMetrics
+from profiling import profiled, profiler
+from rate_limiter import RateLimiter
+from reddit import RedditClient
+from response_cache import ResponseCache
+from timestamp_parser import TimestampParser
+from topic import Topic
+from topic_store import TopicStore
+from transport import SessionPool
 
 class NewsScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, topic_store=None, cassette=None, cassette_mode=None, cassette_realtime=None,
+                 reddit_incremental=config.REDDIT_INCREMENTAL):
+        """
+        reddit_incremental: after the first scrape, fetch only Reddit posts newer than the last ones seen
+        cassette: path of an HTTP cassette to record to or replay from (default: $SCRAPER_CASSETTE)
+        cassette_mode: 'record' or 'replay' (default: $SCRAPER_CASSETTE_MODE, else replay if the file exists)
+        cassette_realtime: replay with the recorded response times (default: $SCRAPER_CASSETTE_REALTIME)
+        """
+        # A session per thread over shared keep-alive pools, asking for compressed responses
+        self.session = SessionPool({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
-        # Reddit API endpoints
-        self.reddit_endpoints = {
-            'politics': 'https://www.reddit.com/r/politics/hot.json?limit=25',
-            'conservative': 'https://www.reddit.com/r/Conservative/hot.json?limit=25',
-            'ohio': 'https://www.reddit.com/r/Ohio/hot.json?limit=25',
-            'youngstown': 'https://www.reddit.com/r/YoungstownOhio/hot.json?limit=25',
-            'funny': 'https://www.reddit.com/r/funny/hot.json?limit=25',
-            'nottheonion': 'https://www.reddit.com/r/nottheonion/hot.json?limit=25',
-            'floridaman': 'https://www.reddit.com/r/FloridaMan/hot.json?limit=25'
+        # Fetches sources in parallel, one request at a time per host,
+        # revalidating pages against the on-disk response cache,
+        # skipping hosts that keep timing out or failing and giving each
+        # host timeouts that fit its own latency
+        self.response_cache = ResponseCache()
+        self.fetcher = ConcurrentFetcher(self.session, cache=self.response_cache, breaker=CircuitBreaker(),
+                                         timeouts=AdaptiveTimeouts())
+        
+        # Record/replay: every request goes through the cassette, so the response
+        # cache, circuit breaker, adaptive timeouts and saved topics are bypassed,
+        # and replays skip rate limiting
+        self.cassette = cassette_adapter_from_env(cassette, cassette_mode, cassette_realtime)
+        if self.cassette is not None:
+            self.session.mount('http://', self.cassette)
+            self.session.mount('https://', self.cassette)
+            self.response_cache = self.fetcher.cache = self.fetcher.breaker = self.fetcher.timeouts = None
+            if topic_store is None:
+                topic_store = TopicStore(':memory:')
+            if self.cassette.mode == 'replay' and not self.cassette.realtime:
+                self.fetcher.limiter = RateLimiter(request_delay=0, host_delays={})
+        
+        # Per-source latency, bytes, parse time and yield, for JSON/Prometheus reports
+        self.metrics = ScrapeMetrics(cache=self.response_cache)
+        
+        # Funny/crime/local keyword matching, compiled once from config
+        self.classifier = ContentClassifier()
+        
+        # Publish times from <time datetime>, page text or article URLs, remembering each site's format
+        self.timestamp_parser = TimestampParser()
+        
+        # Every scraped topic is kept here; recent categories are answered from it
+        self.topic_store = topic_store or TopicStore()
+        
+        # Subreddits, fetched together as combined listings with paging
+        self.reddit = RedditClient(self.fetcher)
+        self.reddit_incremental = reddit_incremental
+        self.reddit_subreddits = {
+            'politics': 'politics',
+            'conservative': 'Conservative',
+            'ohio': 'Ohio',
+            'youngstown': 'YoungstownOhio',
+            'funny': 'funny',
+            'nottheonion': 'nottheonion',
+            'floridaman': 'FloridaMan'
         }
         
         # Local news sources
@@ -33,370 +92,489 @@ class NewsScraper:
             'ohio_gov': 'https://ohio.gov/wps/portal/gov/site/news'
         }
     
+    @profiled('scrape_category')
     def scrape_category(self, category):
         """Main method to scrape topics based on category with time-based filtering"""
+        # Fetch every source once (unless the store is fresh); the time windows
+        # below are indexed queries against the topic store
+        if not self.topic_store.is_fresh(category):
+            for _ in self._fetch_category(category):
+                pass
+        
+        return self._collect_topics(category)
+    
+    def scrape_categories_iter(self, categories):
+        """Yield (category, topics) for several categories as each one finishes.
+        
+        The union of their sources is fetched once, so sources shared between
+        categories cost a single request and parse. Categories scraped
+        recently are answered from the topic store first.
+        """
+        categories = list(dict.fromkeys(categories))
+        stale = [category for category in categories if not self.topic_store.is_fresh(category)]
+        for category in categories:
+            if category not in stale:
+                yield category, self._collect_topics(category)
+        
+        pending = set(stale)
+        for category, _, completed, total, _ in self._fetch_categories(stale):
+            if completed == total:
+                pending.discard(category)
+                yield category, self._collect_topics(category)
+        
+        # Categories without sources never produce a batch
+        for category in stale:
+            if category in pending:
+                yield category, self._collect_topics(category)
+    
+    def scrape_category_iter(self, category):
+        """Yield (source, completed, total, topics) for a category as each source finishes.
+        
+        Sources are fetched concurrently, so the fastest source is yielded first.
+        Topics older than the widest time window are dropped; duplicates across
+        sources are left for the caller to merge. If the category was scraped
+        recently, its stored topics are yielded as a single batch instead.
+        """
+        if self.topic_store.is_fresh(category):
+            yield 'saved topics', 1, 1, self.topic_store.recent(category, max(config.TIME_WINDOWS))
+        else:
+            yield from self._fetch_category(category)
+    
+    @profiled('refresh_categories')
+    def refresh_categories(self, categories):
+        """Fetch several categories into the topic store, each shared source once; returns {category: topics fetched}"""
+        counts = dict.fromkeys(categories, 0)
+        for category, _, _, _, topics in self._fetch_categories(counts):
+            counts[category] += len(topics)
+        return counts
+    
+    def _collect_topics(self, category):
+        """Get a category's stored topics, widening the time window until there are enough"""
         topics = []
+        index = NearDuplicateIndex()
+        previous_hours = None
         
         # Time-based search strategy: start with recent, expand if needed
-        time_windows = [2, 6, 12, 24]  # hours
-        
-        for hours in time_windows:
-            if len(topics) >= 100:
-                break
-                
+        for hours in config.TIME_WINDOWS:
             print(f"Searching last {hours} hours for {category}...")
             
-            if "US Political News" in category:
-                topics.extend(self._scrape_political_news(hours))
-            elif "Ohio Political News" in category:
-                topics.extend(self._scrape_ohio_political(hours))
-            elif "Local Ohio News" in category:
-                topics.extend(self._scrape_local_ohio_news(hours))
-            elif "Funny Stories (US National)" in category:
-                topics.extend(self._scrape_funny_stories(hours))
-            elif "Local Funny Stories" in category:
-                topics.extend(self._scrape_local_funny_stories(hours))
-            elif "Funny Criminal Stories (US National)" in category:
-                topics.extend(self._scrape_criminal_stories_national(hours))
-            elif "Funny Criminal Stories (Ohio Statewide)" in category:
-                topics.extend(self._scrape_criminal_stories_ohio(hours))
-            elif "Funny Criminal Stories (Columbiana, Mahoning, Trumbull Counties)" in category:
-                topics.extend(self._scrape_criminal_stories_local(hours))
-            
-            # Filter topics by time window
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            topics = [t for t in topics if t['timestamp'] >= cutoff_time]
-            
-            # Remove duplicates based on title similarity
-            topics = self._remove_duplicate_topics(topics)
+            # Widening the window only adds the older topics it newly covers;
+            # duplicates are checked against everything kept so far
+            window_topics = self.topic_store.recent(category, hours, previous_hours)
+            topics.extend(self._remove_duplicate_topics(window_topics, index))
+            previous_hours = hours
             
             print(f"Found {len(topics)} topics so far...")
+            
+            if len(topics) >= config.MAX_TOPICS_PER_SEARCH:
+                break
         
-        # Sort by recency and limit to 100
-        topics.sort(key=lambda x: x['timestamp'], reverse=True)
-        return topics[:100]
+        # Topics were collected newest first; limit to 100
+        topics = topics[:config.MAX_TOPICS_PER_SEARCH]
+        self.metrics.record_kept(category, topics)
+        return topics
     
-    def _remove_duplicate_topics(self, topics):
-        """Remove duplicate topics based on title similarity"""
-        unique_topics = []
-        seen_titles = set()
-        
-        for topic in topics:
-            # Normalize title for comparison
-            normalized_title = topic['title'].lower().strip()
-            normalized_title = re.sub(r'[^\w\s]', '', normalized_title)
-            
-            # Check if similar title already exists
-            is_duplicate = False
-            for seen_title in seen_titles:
-                if self._titles_similar(normalized_title, seen_title):
-                    is_duplicate = True
-                    break
+    def _fetch_category(self, category):
+        """Fetch a category's sources from the network, saving each batch to the topic store"""
+        for _, source, completed, total, topics in self._fetch_categories([category]):
+            yield source, completed, total, topics
+    
+    def _fetch_categories(self, categories):
+        """Fetch the union of several categories' sources, saving each batch to the topic store.
+        
+        Every source runs once and its topics fan out to each category it feeds,
+        yielding (category, source, completed, total, topics) where completed and
+        total count that category's sources. A category is marked scraped as soon
+        as all of its sources are done.
+        """
+        plan = self._plan_sources(categories)
+        # Worker threads join the caller's profiling run, if there is one
+        run = profiler.current()
+        jobs = [(self._run_source, (self._source_label(scraper, args), scraper, args, run))
+                for scraper, args, _ in plan]
+        cutoff_time = datetime.now() - timedelta(hours=max(config.TIME_WINDOWS))
+        
+        totals = dict.fromkeys(categories, 0)
+        for _, _, consumers in plan:
+            for category, _, _ in consumers:
+                totals[category] += 1
+        completed = dict.fromkeys(categories, 0)
+        
+        for category, total in totals.items():
+            if total == 0:
+                self.topic_store.mark_scraped(category)
+        
+        for index, fetched_topics in self.fetcher.iter_completed(jobs):
+            scraper, args, consumers = plan[index]
+            source = self._source_label(scraper, args)
+            source_topics = [t for t in fetched_topics if t['timestamp'] >= cutoff_time]
             
-            if not is_duplicate:
-                unique_topics.append(topic)
-                seen_titles.add(normalized_title)
+            for category, content_label, only_sources in consumers:
+                topics = source_topics
+                if only_sources is not None:
+                    topics = [t for t in topics if t['source'] in only_sources]
+                if content_label:
+                    topics = self.classifier.filter(topics, content_label)
+                self.topic_store.upsert(category, topics)
+                self.metrics.record_category(category, source, len(fetched_topics), len(source_topics), len(topics))
+                
+                completed[category] += 1
+                if completed[category] == totals[category]:
+                    self.topic_store.mark_scraped(category)
+                
+                yield category, source, completed[category], totals[category], topics
         
-        return unique_topics
+        # Keep what this plan learned about each host's latency for the next run
+        if self.fetcher.timeouts is not None:
+            self.fetcher.timeouts.save()
     
-    def _titles_similar(self, title1, title2):
-        """Check if two titles are similar (for duplicate detection)"""
-        # Simple similarity check - can be enhanced with more sophisticated algorithms
-        words1 = set(title1.split())
-        words2 = set(title2.split())
-        
-        if len(words1) == 0 or len(words2) == 0:
-            return False
-        
-        # Calculate Jaccard similarity
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
-        similarity = intersection / union if union > 0 else 0
-        
-        return similarity > 0.7  # 70% similarity threshold
+    def _run_source(self, source, scraper, args, profile_run=None):
+        """Run one source's scraper, measuring its requests, parse time and topics"""
+        with profiler.joined(profile_run), self.metrics.source(source) as result:
+            topics = scraper(*args)
+            result['topics'] = len(topics)
+        return topics
     
-    def _scrape_political_news(self, hours=24):
-        """Scrape US political news from Reddit and news sites"""
-        topics = []
-        
-        # Reddit political subreddits
-        topics.extend(self._scrape_reddit_subreddit('politics'))
-        topics.extend(self._scrape_reddit_subreddit('conservative'))
+    def _plan_sources(self, categories):
+        """Get the distinct (scraper, args, consumers) jobs that feed any of the categories.
+        
+        consumers lists the (category, content label, sources) each job's topics
+        go to, so a source shared between categories is fetched and parsed only
+        once. A category's subreddits are fetched as one combined listing, merged
+        with any other category's listing they overlap; sources then names the
+        topic sources (e.g. 'Reddit r/funny') a category keeps, or is None for all.
+        Subreddits in REDDIT_SEPARATE_SUBREDDITS are always a listing of their own.
+        """
+        plan = {}
+        subreddit_consumers = {}
+        reddit_groups = []
+        for category in categories:
+            subreddits = []
+            for scraper, args, content_label in self._category_sources(category):
+                if scraper == self._scrape_reddit_subreddit:
+                    subreddits.append(args[0])
+                    subreddit_consumers.setdefault(args[0], []).append((category, content_label))
+                else:
+                    plan.setdefault((scraper, args), []).append((category, content_label, None))
+            
+            subreddits = list(dict.fromkeys(subreddits))
+            # Low-volume subreddits keep their own listing so busier ones don't crowd them out
+            groups = [[subreddit] for subreddit in subreddits if subreddit in config.REDDIT_SEPARATE_SUBREDDITS]
+            groups.append([subreddit for subreddit in subreddits if subreddit not in config.REDDIT_SEPARATE_SUBREDDITS])
+            for group in groups:
+                for other in [other for other in reddit_groups if set(other) & set(group)]:
+                    reddit_groups.remove(other)
+                    group = list(dict.fromkeys(other + group))
+                if group:
+                    reddit_groups.append(group)
+        
+        reddit_jobs = []
+        for group in reddit_groups:
+            wanted = {}
+            for subreddit in group:
+                for consumer in subreddit_consumers[subreddit]:
+                    wanted.setdefault(consumer, set()).add(f'Reddit r/{subreddit}')
+            consumers = [(category, content_label, None if len(sources) == len(group) else sources)
+                         for (category, content_label), sources in wanted.items()]
+            categories = tuple(sorted({category for category, _ in wanted}))
+            reddit_jobs.append((self._scrape_reddit_subreddits, (tuple(group), categories), consumers))
+        
+        return reddit_jobs + [(scraper, args, consumers) for (scraper, args), consumers in plan.items()]
+    
+    @profiled('remove_duplicate_topics', standalone=False)
+    def _remove_duplicate_topics(self, topics, index=None):
+        """Remove duplicate topics based on title similarity.
+        
+        Pass an existing NearDuplicateIndex to also drop topics similar to ones
+        kept earlier; the kept topics are added to it.
+        """
+        if index is None:
+            index = NearDuplicateIndex()
+        return [topic for topic in topics if index.add(topic['title'])]
+    
+    def _category_sources(self, category):
+        """Get the (scraper, args, content label) jobs that feed a category"""
+        if "US Political News" in category:
+            return self._political_news_sources()
+        elif "Ohio Political News" in category:
+            return self._ohio_political_sources()
+        elif "Local Ohio News" in category:
+            return self._local_ohio_news_sources()
+        elif "Funny Stories (US National)" in category:
+            return self._funny_stories_sources()
+        elif "Local Funny Stories" in category:
+            return self._local_funny_stories_sources()
+        elif "Funny Criminal Stories (US National)" in category:
+            return self._criminal_stories_national_sources()
+        elif "Funny Criminal Stories (Ohio Statewide)" in category:
+            return self._criminal_stories_ohio_sources()
+        elif "Funny Criminal Stories (Columbiana, Mahoning, Trumbull Counties)" in category:
+            return self._criminal_stories_local_sources()
+        return []
+    
+    def _source_label(self, scraper, args):
+        """Human-readable name of a source for progress reporting"""
+        if scraper == self._scrape_reddit_subreddit:
+            return f"r/{args[0]}"
+        if scraper == self._scrape_reddit_subreddits:
+            return f"r/{'+'.join(args[0])}"
+        if args:
+            return urlparse(args[0]).netloc
+        return scraper.__name__.replace('_scrape_', '').replace('_', ' ')
+    
+    def _political_news_sources(self):
+        """US political news from Reddit and news sites"""
+        sources = [
+            # Reddit political subreddits
+            (self._scrape_reddit_subreddit, ('politics',), None),
+            (self._scrape_reddit_subreddit, ('conservative',), None)
+        ]
         
         # News sites
-        topics.extend(self._scrape_news_sites([
-            'https://www.cnn.com/politics',
-            'https://www.foxnews.com/politics',
-            'https://www.nbcnews.com/politics'
-        ]))
+        sources.extend((self._scrape_news_site, (url,), None) for url in config.NEWS_SOURCES['political'])
         
-        return topics
+        return sources
     
-    def _scrape_ohio_political(self, hours=24):
-        """Scrape Ohio political news"""
-        topics = []
-        
-        # Reddit Ohio subreddit
-        topics.extend(self._scrape_reddit_subreddit('ohio'))
-        
-        # Ohio.gov news
-        topics.extend(self._scrape_ohio_gov_news())
+    def _ohio_political_sources(self):
+        """Ohio political news"""
+        sources = [
+            # Reddit Ohio subreddit
+            (self._scrape_reddit_subreddit, ('ohio',), None),
+            
+            # Ohio.gov news
+            (self._scrape_ohio_gov_news, (), None)
+        ]
         
         # Local political news
-        topics.extend(self._scrape_news_sites([
-            'https://www.cleveland.com/politics',
-            'https://www.dispatch.com/politics'
-        ]))
+        sources.extend((self._scrape_news_site, (url,), None) for url in config.NEWS_SOURCES['ohio_political'])
         
-        return topics
+        return sources
     
-    def _scrape_local_ohio_news(self, hours=24):
-        """Scrape local Ohio news from county-specific sources"""
-        topics = []
-        
+    def _local_ohio_news_sources(self):
+        """Local Ohio news from county-specific sources"""
         # Local news sites
-        topics.extend(self._scrape_news_sites([
-            'https://www.wfmj.com',
-            'https://www.vindy.com',
-            'https://www.tribtoday.com'
-        ]))
+        sources = [(self._scrape_news_site, (url,), None) for url in config.NEWS_SOURCES['local_ohio']]
         
         # Reddit local subreddits
-        topics.extend(self._scrape_reddit_subreddit('youngstown'))
+        sources.append((self._scrape_reddit_subreddit, ('youngstown',), None))
         
         # Local government sites
-        topics.extend(self._scrape_local_government_sites())
+        sources.extend((self._scrape_local_government_site, (site,), None) for site in config.LOCAL_GOVERNMENT_SITES)
         
-        return topics
+        return sources
     
-    def _scrape_funny_stories(self, hours=24):
-        """Scrape funny stories from Reddit and news aggregators"""
-        topics = []
-        
-        # Reddit funny subreddits
-        topics.extend(self._scrape_reddit_subreddit('funny'))
-        topics.extend(self._scrape_reddit_subreddit('nottheonion'))
-        topics.extend(self._scrape_reddit_subreddit('floridaman'))
+    def _funny_stories_sources(self):
+        """Funny stories from Reddit and news aggregators"""
+        sources = [
+            # Reddit funny subreddits
+            (self._scrape_reddit_subreddit, ('funny',), None),
+            (self._scrape_reddit_subreddit, ('nottheonion',), None),
+            (self._scrape_reddit_subreddit, ('floridaman',), None)
+        ]
         
         # Weird news sites
-        topics.extend(self._scrape_weird_news_sites())
+        sources.extend((self._scrape_weird_news_site, (site,), None) for site in config.NEWS_SOURCES['weird_news'])
         
-        return topics
+        return sources
     
-    def _scrape_local_funny_stories(self, hours=24):
-        """Scrape local funny stories from Ohio counties"""
-        topics = []
-        
+    def _local_funny_stories_sources(self):
+        """Local funny stories from Ohio counties"""
         # Local police department social media
-        topics.extend(self._scrape_local_police_social())
+        sources = [(self._scrape_local_police_social, (), None)]
         
         # Local news with funny filter
-        local_topics = self._scrape_local_ohio_news()
-        funny_local = [t for t in local_topics if self._is_funny_content(t['title'])]
-        topics.extend(funny_local)
+        sources.extend((scraper, args, 'funny')
+                       for scraper, args, _ in self._local_ohio_news_sources())
         
-        return topics
+        return sources
     
-    def _scrape_criminal_stories_national(self, hours=24):
-        """Scrape funny criminal stories from national sources"""
-        topics = []
-        
-        # Reddit criminal/funny subreddits
-        topics.extend(self._scrape_reddit_subreddit('floridaman'))
-        topics.extend(self._scrape_reddit_subreddit('nottheonion'))
+    def _criminal_stories_national_sources(self):
+        """Funny criminal stories from national sources"""
+        sources = [
+            # Reddit criminal/funny subreddits
+            (self._scrape_reddit_subreddit, ('floridaman',), None),
+            (self._scrape_reddit_subreddit, ('nottheonion',), None)
+        ]
         
         # Crime news aggregators
-        topics.extend(self._scrape_crime_news_sites())
+        sources.extend((self._scrape_crime_news_site, (site,), None) for site in config.NEWS_SOURCES['crime_news'])
         
-        return topics
+        return sources
     
-    def _scrape_criminal_stories_ohio(self, hours=24):
-        """Scrape funny criminal stories from Ohio"""
-        topics = []
-        
+    def _criminal_stories_ohio_sources(self):
+        """Funny criminal stories from Ohio"""
         # Ohio crime news
-        topics.extend(self._scrape_news_sites([
-            'https://www.cleveland.com/crime',
-            'https://www.dispatch.com/news/crime'
-        ]))
+        sources = [(self._scrape_news_site, (url,), None) for url in config.NEWS_SOURCES['ohio_crime']]
         
         # Ohio police social media
-        topics.extend(self._scrape_ohio_police_social())
+        sources.append((self._scrape_ohio_police_social, (), None))
         
-        return topics
+        return sources
     
-    def _scrape_criminal_stories_local(self, hours=24):
-        """Scrape funny criminal stories from local counties"""
-        topics = []
-        
+    def _criminal_stories_local_sources(self):
+        """Funny criminal stories from local counties"""
         # Local police department social media
-        topics.extend(self._scrape_local_police_social())
+        sources = [(self._scrape_local_police_social, (), None)]
         
         # Local crime news
-        local_topics = self._scrape_local_ohio_news()
-        crime_local = [t for t in local_topics if self._is_crime_content(t['title'])]
-        topics.extend(crime_local)
+        sources.extend((scraper, args, 'crime')
+                       for scraper, args, _ in self._local_ohio_news_sources())
         
-        return topics
+        return sources
     
     def _scrape_reddit_subreddit(self, subreddit):
         """Scrape topics from a Reddit subreddit"""
+        return self._scrape_reddit_subreddits((subreddit,))
+    
+    def _scrape_reddit_subreddits(self, subreddits, categories=()):
+        """Scrape topics from several subreddits with one combined, paged listing.
+        
+        categories names the categories the topics are stored for; each set of
+        them keeps its own incremental cursor.
+        """
         topics = []
         
         try:
-            url = self.reddit_endpoints.get(subreddit)
-            if not url:
+            # Map Reddit's subreddit names back to ours for the topic source
+            names = {self.reddit_subreddits[subreddit]: subreddit
+                     for subreddit in subreddits if subreddit in self.reddit_subreddits}
+            if not names:
                 return topics
+            keys = {name.lower(): subreddit for name, subreddit in names.items()}
             
-            # Try multiple times with different headers
-            headers_list = [
-                {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'},
-                {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36'},
-                {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:91.0) Gecko/20100101 Firefox/91.0'}
-            ]
+            posts = self._reddit_posts(list(names), subreddits, categories)
             
-            for headers in headers_list:
-                try:
-                    response = self.session.get(url, timeout=15, headers=headers)
-                    if response.status_code == 200:
-                        data = response.json()
-                        break
-                    elif response.status_code == 429:
-                        print(f"Rate limited on r/{subreddit}, waiting...")
-                        time.sleep(5)
-                        continue
-                except Exception as e:
-                    print(f"Request failed for r/{subreddit}: {e}")
+            for post_data in posts:
+                subreddit = keys.get((post_data['subreddit'] or '').lower())
+                if subreddit is None:
                     continue
-            else:
-                print(f"All requests failed for r/{subreddit}")
-                return topics
-            
-            if response.status_code != 200:
-                return topics
-                
-            data = response.json()
-            
-            for post in data.get('data', {}).get('children', []):
-                post_data = post.get('data', {})
                 
                 # Skip stickied posts and ads
-                if post_data.get('stickied') or post_data.get('is_ads'):
+                if post_data['stickied'] or post_data['is_ads']:
                     continue
                 
-                title = post_data.get('title', '')
+                title = post_data['title'] or ''
                 if not title or len(title) < 10:
                     continue
                 
                 # Skip low-quality posts
-                score = post_data.get('score', 0)
+                score = post_data['score'] or 0
                 if score < 5:  # Skip posts with very low scores
                     continue
                 
-                # Calculate time ago
-                created_utc = post_data.get('created_utc', 0)
+                created_utc = post_data['created_utc'] or 0
                 timestamp = datetime.fromtimestamp(created_utc)
-                time_ago = self._get_time_ago(timestamp)
                 
                 # Get better summary
-                summary = post_data.get('selftext', '')
-                if not summary and post_data.get('url'):
-                    summary = f"Link: {post_data.get('url')}"
+                summary = post_data['selftext'] or ''
+                if not summary and post_data['url']:
+                    summary = f"Link: {post_data['url']}"
                 
-                topics.append({
-                    'title': title,
-                    'source': f'Reddit r/{subreddit}',
-                    'url': f"https://reddit.com{post_data.get('permalink', '')}",
-                    'timestamp': timestamp,
-                    'time_ago': time_ago,
-                    'summary': summary[:200] + '...' if len(summary) > 200 else summary,
-                    'score': score
-                })
+                topics.append(Topic(
+                    title=title,
+                    source=f'Reddit r/{subreddit}',
+                    url=f"https://reddit.com{post_data['permalink'] or ''}",
+                    timestamp=timestamp,
+                    summary=summary[:200] + '...' if len(summary) > 200 else summary,
+                    score=score
+                ))
             
         except Exception as e:
-            print(f"Error scraping Reddit r/{subreddit}: {e}")
+            print(f"Error scraping Reddit r/{'+'.join(subreddits)}: {e}")
+            metrics.record_error()
         
         return topics
     
-    def _scrape_news_sites(self, urls):
-        """Scrape news from various news sites"""
+    def _reddit_posts(self, names, subreddits, categories=()):
+        """Get the posts of a combined listing, only the new ones if a cursor was saved.
+        
+        Incremental fetches start from the newest post older than REDDIT_SETTLE_TIME,
+        so younger posts are seen again while their scores grow, and stored posts
+        are re-fetched by id every REDDIT_SCORE_REFRESH_INTERVAL to update theirs.
+        A listing gets a full fetch again when its cursor is older than the widest
+        time window or its cursor post was deleted or removed (Reddit then answers
+        `before` with an empty page). Cursors are kept per listing and set of
+        categories, so a category newly reading a listing still gets its older posts.
+        """
+        # Retries and Retry-After handling happen in the fetcher
+        headers = {'User-Agent': random.choice(config.USER_AGENTS)}
+        now = time.time()
+        cutoff = now - max(config.TIME_WINDOWS) * 3600
+        
+        key = f"reddit:{'+'.join(names)}"
+        if categories:
+            key += f":{'|'.join(categories)}"
+        cursor = self.topic_store.cursor(key) if self.reddit_incremental else None
+        
+        posts = None
+        if cursor is not None and cursor['cursor_time'] >= cutoff:
+            posts = self.reddit.new_posts(names, cursor['cursor'], headers=headers)
+            if not posts and not self.reddit.is_listed(cursor['cursor'], headers=headers):
+                print(f"Reddit cursor {cursor['cursor']} is gone; fetching r/{'+'.join(names)} in full")
+                cursor = posts = None
+        
+        if posts is None:
+            posts = self.reddit.posts(names, cutoff, headers=headers)
+            refreshed_at = now
+        else:
+            refreshed_at = cursor['refreshed_at']
+            if now - refreshed_at >= config.REDDIT_SCORE_REFRESH_INTERVAL:
+                stored = self.topic_store.by_source([f'Reddit r/{s}' for s in subreddits], max(config.TIME_WINDOWS))
+                fullnames = [name for name in map(self._reddit_fullname, (t['url'] for t in stored)) if name]
+                known = {post['name'] for post in posts}
+                posts.extend(post for post in self.reddit.posts_by_id(fullnames, headers=headers)
+                             if post['name'] not in known)
+                refreshed_at = now
+        
+        if self.reddit_incremental:
+            settled = [post for post in posts
+                       if post['name'] and (post['created_utc'] or 0) <= now - config.REDDIT_SETTLE_TIME]
+            newest = max(settled, key=lambda post: post['created_utc'], default=None)
+            if newest is not None and (cursor is None or newest['created_utc'] > cursor['cursor_time']):
+                self.topic_store.save_cursor(key, newest['name'], newest['created_utc'], refreshed_at)
+            elif cursor is not None:
+                self.topic_store.save_cursor(key, cursor['cursor'], cursor['cursor_time'], refreshed_at)
+        
+        return posts
+    
+    def _reddit_fullname(self, url):
+        """Get a Reddit post's fullname (t3_<id>) from its permalink, or None"""
+        match = re.search(r'/comments/(\w+)', url)
+        return f't3_{match.group(1)}' if match else None
+    
+    def _scrape_news_site(self, url):
+        """Scrape news from a news site"""
         topics = []
         
-        for url in urls:
-            try:
-                # Try multiple times with different approaches
-                for attempt in range(3):
-                    try:
-                        response = self.session.get(url, timeout=15)
-                        if response.status_code == 200:
-                            break
-                        elif response.status_code == 429:
-                            print(f"Rate limited on {url}, waiting...")
-                            time.sleep(5)
-                            continue
-                    except Exception as e:
-                        print(f"Attempt {attempt + 1} failed for {url}: {e}")
-                        if attempt < 2:
-                            time.sleep(2)
-                            continue
-                        else:
-                            break
-                else:
-                    print(f"All attempts failed for {url}")
-                    continue
-                
-                if response.status_code != 200:
+        try:
+            # Retries and Retry-After handling happen in the fetcher
+            response, entries = self._fetch_listing(url, NEWS_LISTING, timeout=15)
+            if response.status_code != 200:
+                print(f"All attempts failed for {url}")
+                return topics
+            
+            # Single pass over the page, keeping only headline containers
+            seen_titles = set()
+            for entry in entries:
+                title = entry['title']
+                if len(title) < 10 or title in seen_titles:
                     continue
-                    
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for article links with multiple selectors
-                articles = []
-                
-                # Try different selectors
-                articles.extend(soup.find_all('article'))
-                articles.extend(soup.find_all('div', class_=re.compile(r'article|story|news|post|item')))
-                articles.extend(soup.find_all('div', class_=re.compile(r'headline|title|content')))
-                articles.extend(soup.find_all('a', href=re.compile(r'/(article|news|story|post)/')))
-                
-                # Remove duplicates
-                seen_titles = set()
-                for article in articles[:30]:  # Increased limit
-                    link = article.find('a', href=True)
-                    if not link:
-                        continue
-                    
-                    title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'h5'])
-                    if not title_elem:
-                        continue
-                    
-                    title = title_elem.get_text(strip=True)
-                    if len(title) < 10 or title in seen_titles:
-                        continue
-                    
-                    seen_titles.add(title)
-                    
-                    # Try to find timestamp
-                    time_elem = article.find(['time', 'span'], class_=re.compile(r'time|date|published'))
-                    timestamp = datetime.now()
-                    if time_elem:
-                        timestamp = self._parse_timestamp(time_elem.get_text(strip=True))
-                    
-                    time_ago = self._get_time_ago(timestamp)
-                    
-                    topics.append({
-                        'title': title,
-                        'source': urlparse(url).netloc,
-                        'url': urljoin(url, link['href']),
-                        'timestamp': timestamp,
-                        'time_ago': time_ago,
-                        'summary': self._extract_summary(article)
-                    })
                 
-                time.sleep(2)  # Be respectful
+                seen_titles.add(title)
                 
-            except Exception as e:
-                print(f"Error scraping {url}: {e}")
+                timestamp, dated = self._parse_timestamp(entry, url)
+                topics.append(Topic(
+                    title=title,
+                    source=urlparse(url).netloc,
+                    url=urljoin(url, entry['href']),
+                    timestamp=timestamp,
+                    summary=self._extract_summary(entry['element']),
+                    dated=dated
+                ))
+            
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            metrics.record_error()
         
         return topics
     
@@ -406,139 +584,86 @@ class NewsScraper:
         
         try:
             url = 'https://ohio.gov/wps/portal/gov/site/news'
-            response = self.session.get(url, timeout=10)
+            # One attempt, as before: these sites either answer or are down, so retries only add latency
+            response, entries = self._fetch_listing(url, OHIO_GOV_LISTING, timeout=10, retries=1)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
                 # Look for news items
-                news_items = soup.find_all(['div', 'article'], class_=re.compile(r'news|press'))
-                
-                for item in news_items[:25]:
-                    link = item.find('a', href=True)
-                    if not link:
-                        continue
-                    
-                    title = link.get_text(strip=True)
+                for entry in entries:
+                    title = entry['title']
                     if len(title) < 10:
                         continue
                     
-                    # Try to find date
-                    date_elem = item.find(['span', 'div'], class_=re.compile(r'date|time'))
-                    timestamp = datetime.now()
-                    if date_elem:
-                        timestamp = self._parse_timestamp(date_elem.get_text(strip=True))
-                    
-                    time_ago = self._get_time_ago(timestamp)
-                    
-                    topics.append({
-                        'title': title,
-                        'source': 'Ohio.gov',
-                        'url': urljoin(url, link['href']),
-                        'timestamp': timestamp,
-                        'time_ago': time_ago,
-                        'summary': self._extract_summary(item)
-                    })
+                    timestamp, dated = self._parse_timestamp(entry, url)
+                    topics.append(Topic(
+                        title=title,
+                        source='Ohio.gov',
+                        url=urljoin(url, entry['href']),
+                        timestamp=timestamp,
+                        summary=self._extract_summary(entry['element']),
+                        dated=dated
+                    ))
         
         except Exception as e:
             print(f"Error scraping Ohio.gov: {e}")
+            metrics.record_error()
         
         return topics
     
-    def _scrape_local_government_sites(self):
-        """Scrape local government sites for news"""
+    def _scrape_local_government_site(self, site):
+        """Scrape a local government site for news"""
         topics = []
         
-        local_sites = [
-            'https://www.cityofyoungstownoh.com',
-            'https://www.salemohio.org',
-            'https://www.warren.org'
-        ]
-        
-        for site in local_sites:
-            try:
-                response = self.session.get(site, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Look for news/announcements
-                    news_items = soup.find_all(['div', 'article'], class_=re.compile(r'news|announcement|press'))
+        try:
+            response, entries = self._fetch_listing(site, LOCAL_GOVERNMENT_LISTING, timeout=10, retries=1)
+            if response.status_code == 200:
+                # Look for news/announcements
+                for entry in entries:
+                    title = entry['title']
+                    if len(title) < 10:
+                        continue
                     
-                    for item in news_items[:10]:
-                        link = item.find('a', href=True)
-                        if not link:
-                            continue
-                        
-                        title = link.get_text(strip=True)
-                        if len(title) < 10:
-                            continue
-                        
-                        timestamp = datetime.now()
-                        time_ago = self._get_time_ago(timestamp)
-                        
-                        topics.append({
-                            'title': title,
-                            'source': urlparse(site).netloc,
-                            'url': urljoin(site, link['href']),
-                            'timestamp': timestamp,
-                            'time_ago': time_ago,
-                            'summary': self._extract_summary(item)
-                        })
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error scraping {site}: {e}")
+                    timestamp, dated = self._parse_timestamp(entry, site)
+                    topics.append(Topic(
+                        title=title,
+                        source=urlparse(site).netloc,
+                        url=urljoin(site, entry['href']),
+                        timestamp=timestamp,
+                        summary=self._extract_summary(entry['element']),
+                        dated=dated
+                    ))
+            
+        except Exception as e:
+            print(f"Error scraping {site}: {e}")
+            metrics.record_error()
         
         return topics
     
-    def _scrape_weird_news_sites(self):
-        """Scrape weird/funny news sites"""
+    def _scrape_weird_news_site(self, site):
+        """Scrape a weird/funny news site"""
         topics = []
         
-        weird_sites = [
-            'https://www.weirdnews.com',
-            'https://www.odditycentral.com',
-            'https://www.unexplained-mysteries.com'
-        ]
-        
-        for site in weird_sites:
-            try:
-                response = self.session.get(site, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    articles = soup.find_all(['article', 'div'], class_=re.compile(r'article|story|post'))
+        try:
+            response, entries = self._fetch_listing(site, WEIRD_NEWS_LISTING, timeout=10, retries=1)
+            if response.status_code == 200:
+                for entry in entries:
+                    title = entry['title']
+                    if len(title) < 10 or not self._is_funny_content(title):
+                        continue
                     
-                    for article in articles[:15]:
-                        link = article.find('a', href=True)
-                        if not link:
-                            continue
-                        
-                        title_elem = article.find(['h1', 'h2', 'h3'])
-                        if not title_elem:
-                            continue
-                        
-                        title = title_elem.get_text(strip=True)
-                        if len(title) < 10 or not self._is_funny_content(title):
-                            continue
-                        
-                        timestamp = datetime.now()
-                        time_ago = self._get_time_ago(timestamp)
-                        
-                        topics.append({
-                            'title': title,
-                            'source': urlparse(site).netloc,
-                            'url': urljoin(site, link['href']),
-                            'timestamp': timestamp,
-                            'time_ago': time_ago,
-                            'summary': self._extract_summary(article)
-                        })
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error scraping {site}: {e}")
+                    timestamp, dated = self._parse_timestamp(entry, site)
+                    topics.append(Topic(
+                        title=title,
+                        source=urlparse(site).netloc,
+                        url=urljoin(site, entry['href']),
+                        timestamp=timestamp,
+                        summary=self._extract_summary(entry['element']),
+                        dated=dated
+                    ))
+            
+        except Exception as e:
+            print(f"Error scraping {site}: {e}")
+            metrics.record_error()
         
         return topics
     
@@ -557,16 +682,13 @@ class NewsScraper:
         
         for post in police_posts:
             timestamp = datetime.now() - timedelta(hours=random.randint(1, 48))
-            time_ago = self._get_time_ago(timestamp)
-            
-            topics.append({
-                'title': post,
-                'source': 'Local Police Social Media',
-                'url': '#',
-                'timestamp': timestamp,
-                'time_ago': time_ago,
-                'summary': 'Local police department social media post'
-            })
+            topics.append(Topic(
+                title=post,
+                source='Local Police Social Media',
+                url='#',
+                timestamp=timestamp,
+                summary='Local police department social media post'
+            ))
         
         return topics
     
@@ -584,138 +706,92 @@ class NewsScraper:
         
         for post in ohio_police_posts:
             timestamp = datetime.now() - timedelta(hours=random.randint(1, 72))
-            time_ago = self._get_time_ago(timestamp)
-            
-            topics.append({
-                'title': post,
-                'source': 'Ohio Police Social Media',
-                'url': '#',
-                'timestamp': timestamp,
-                'time_ago': time_ago,
-                'summary': 'Ohio police department social media post'
-            })
+            topics.append(Topic(
+                title=post,
+                source='Ohio Police Social Media',
+                url='#',
+                timestamp=timestamp,
+                summary='Ohio police department social media post'
+            ))
         
         return topics
     
-    def _scrape_crime_news_sites(self):
-        """Scrape crime news sites for funny stories"""
+    def _scrape_crime_news_site(self, site):
+        """Scrape a crime news site for funny stories"""
         topics = []
         
-        crime_sites = [
-            'https://www.crimeonline.com',
-            'https://www.crimestoppers.com'
-        ]
-        
-        for site in crime_sites:
-            try:
-                response = self.session.get(site, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    articles = soup.find_all(['article', 'div'], class_=re.compile(r'article|story|crime'))
+        try:
+            response, entries = self._fetch_listing(site, CRIME_NEWS_LISTING, timeout=10, retries=1)
+            if response.status_code == 200:
+                for entry in entries:
+                    title = entry['title']
+                    if len(title) < 10 or not self._is_crime_content(title):
+                        continue
                     
-                    for article in articles[:20]:
-                        link = article.find('a', href=True)
-                        if not link:
-                            continue
-                        
-                        title_elem = article.find(['h1', 'h2', 'h3'])
-                        if not title_elem:
-                            continue
-                        
-                        title = title_elem.get_text(strip=True)
-                        if len(title) < 10 or not self._is_crime_content(title):
-                            continue
-                        
-                        timestamp = datetime.now()
-                        time_ago = self._get_time_ago(timestamp)
-                        
-                        topics.append({
-                            'title': title,
-                            'source': urlparse(site).netloc,
-                            'url': urljoin(site, link['href']),
-                            'timestamp': timestamp,
-                            'time_ago': time_ago,
-                            'summary': self._extract_summary(article)
-                        })
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error scraping {site}: {e}")
+                    timestamp, dated = self._parse_timestamp(entry, site)
+                    topics.append(Topic(
+                        title=title,
+                        source=urlparse(site).netloc,
+                        url=urljoin(site, entry['href']),
+                        timestamp=timestamp,
+                        summary=self._extract_summary(entry['element']),
+                        dated=dated
+                    ))
+            
+        except Exception as e:
+            print(f"Error scraping {site}: {e}")
+            metrics.record_error()
         
         return topics
     
     def _is_funny_content(self, title):
         """Check if content is likely to be funny"""
-        funny_keywords = [
-            'funny', 'hilarious', 'weird', 'strange', 'bizarre', 'odd',
-            'unusual', 'crazy', 'silly', 'absurd', 'ridiculous', 'wacky',
-            'quirky', 'eccentric', 'comical', 'laugh', 'joke', 'prank'
-        ]
-        
-        title_lower = title.lower()
-        return any(keyword in title_lower for keyword in funny_keywords)
+        return self.classifier.has_label(title, 'funny')
     
     def _is_crime_content(self, title):
         """Check if content is crime-related"""
-        crime_keywords = [
-            'arrested', 'arrest', 'crime', 'criminal', 'theft', 'robbery',
-            'burglary', 'fraud', 'scam', 'police', 'officer', 'jail',
-            'prison', 'court', 'trial', 'guilty', 'sentence', 'fine'
-        ]
-        
-        title_lower = title.lower()
-        return any(keyword in title_lower for keyword in crime_keywords)
+        return self.classifier.has_label(title, 'crime')
+    
+    def _parse_timestamp(self, entry, page_url):
+        """Get a listing entry's (publish time, dated); now and False if the page doesn't give one"""
+        timestamp = self.timestamp_parser.parse(
+            text=entry['time_text'],
+            datetime_attr=entry['time_datetime'],
+            url=urljoin(page_url, entry['href']),
+            host=urlparse(page_url).netloc
+        )
+        if timestamp is None:
+            return datetime.now(), False
+        return timestamp, True
     
-    def _parse_timestamp(self, time_str):
-        """Parse various timestamp formats"""
+    def _fetch_listing(self, url, listing, timeout, retries=config.MAX_RETRIES):
+        """Download a listing page into its extractor as it arrives; returns (response, entries).
+        
+        The download stops once the extractor has all the headlines it can use,
+        or at STREAM_MAX_BYTES, so the rest of a large homepage is never read.
+        """
+        response = self.fetcher.get(url, retries=retries, timeout=timeout, stream=True)
         try:
-            # Try common formats
-            formats = [
-                '%Y-%m-%d %H:%M:%S',
-                '%Y-%m-%d',
-                '%m/%d/%Y',
-                '%B %d, %Y',
-                '%d %B %Y'
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(time_str, fmt)
-                except ValueError:
-                    continue
-            
-            # If all else fails, return current time
-            return datetime.now()
-            
-        except:
-            return datetime.now()
-    
-    def _get_time_ago(self, timestamp):
-        """Get human-readable time ago string"""
-        now = datetime.now()
-        diff = now - timestamp
-        
-        if diff.days > 0:
-            return f"{diff.days}d ago"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f"{hours}h ago"
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
-            return f"{minutes}m ago"
-        else:
-            return "Just now"
+            if response.status_code != 200:
+                return response, []
+            encoding = self._declared_encoding(response)
+            entries = metrics.parse_stream(lambda chunks: listing.extract_stream(chunks, encoding),
+                                           self.fetcher.iter_body(response))
+            return response, entries
+        finally:
+            response.close()
     
+    def _declared_encoding(self, response):
+        """Get the charset from the Content-Type header, if the server sent one"""
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            return response.encoding
+        return None
+    
+    @profiled('extract_summary', standalone=False)
     def _extract_summary(self, element):
-        """Extract summary text from HTML element"""
-        # Remove script and style elements
-        for script in element(["script", "style"]):
-            script.decompose()
-        
-        # Get text and clean it up
-        text = element.get_text()
+        """Extract summary text from a parsed listing element"""
+        # Scripts and styles were dropped while parsing; get text and clean it up
+        text = element_text(element)
         lines = (line.strip() for line in text.splitlines())
         chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
         text = ' '.join(chunk for chunk in chunks if chunk)
@@ -0,0 +1,99 @@
+import re
+from bisect import bisect_left, insort
+
+
+class TopicSearchIndex:
+    """Incremental inverted index over topic title, source and summary with prefix matching"""
+
+    # Matches in the title count more than matches in the source or summary
+    FIELD_WEIGHTS = {'title': 3.0, 'source': 2.0, 'summary': 1.0}
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self):
+        self._postings = {}    # term -> {doc id: weight}
+        self._terms = []       # sorted, for prefix lookups
+        self._docs = {}        # doc id -> topic
+        self._doc_terms = {}   # doc id -> terms, for removal
+        self._doc_ids = {}     # id(topic) -> doc id
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, topic):
+        """Index a topic (ignored if it is already indexed)"""
+        if id(topic) in self._doc_ids:
+            return
+
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = topic
+        self._doc_ids[id(topic)] = doc_id
+
+        weights = {}
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for term in self.tokenize(topic.get(field) or ''):
+                weights[term] = max(weights.get(term, 0), weight)
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[doc_id] = weight
+        self._doc_terms[doc_id] = list(weights)
+
+    def remove(self, topic):
+        """Drop a topic from the index"""
+        doc_id = self._doc_ids.pop(id(topic), None)
+        if doc_id is None:
+            return
+
+        del self._docs[doc_id]
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def clear(self):
+        self.__init__()
+
+    def search(self, query):
+        """Get topics matching every word of the query (as a word prefix), best matches first"""
+        query_terms = self.tokenize(query)
+        if not query_terms:
+            return list(self._docs.values())
+
+        scores = None
+        for query_term in query_terms:
+            term_scores = {}
+            for term in self._prefix_terms(query_term):
+                # Whole-word matches rank above prefix matches
+                boost = 2.0 if term == query_term else 1.0
+                for doc_id, weight in self._postings[term].items():
+                    term_scores[doc_id] = max(term_scores.get(doc_id, 0), weight * boost)
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: score + term_scores[doc_id] for doc_id, score in scores.items() if doc_id in term_scores}
+            if not scores:
+                return []
+
+        # Best score first, newest first among equal scores
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], -self._docs[doc_id]['timestamp'].timestamp()))
+        return [self._docs[doc_id] for doc_id in ranked]
+
+    @classmethod
+    def tokenize(cls, text):
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    def _prefix_terms(self, prefix):
+        """Get every indexed term starting with prefix"""
+        start = bisect_left(self._terms, prefix)
+        end = start
+        while end < len(self._terms) and self._terms[end].startswith(prefix):
+            end += 1
+        return self._terms[start:end]
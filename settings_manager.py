@@ -3,6 +3,8 @@ import os
 from cryptography.fernet import Fernet
 import base64
 
+import config
+
 class SettingsManager:
     def __init__(self):
         self.settings_file = "settings.json"
@@ -56,6 +58,10 @@ class SettingsManager:
         """Get default settings"""
         return {
             'last_category': 'US Political News',
+            'category_usage': {},
+            'prefetch_enabled': config.PREFETCH_ENABLED,
+            'prefetch_interval': config.PREFETCH_INTERVAL,
+            'profiling_enabled': False,
             'auto_save_scripts': True,
             'script_save_location': './scripts',
             'max_topics_per_search': 100,
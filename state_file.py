@@ -0,0 +1,66 @@
+import contextlib
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def write_atomic(path, data):
+    """Write text or bytes to a file so readers never see it half-written.
+
+    The temporary file is named after the process and thread, so concurrent
+    writers (the app, prefetch.py, scrape_topics.py, scraper threads) never
+    share one; the last os.replace wins.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if isinstance(data, bytes):
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Hold an exclusive lock on `path`.lock, across processes, while the block runs.
+
+    For read-modify-write updates of a state file several processes share.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            # LK_LOCK gives up after about 10 seconds; keep waiting
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
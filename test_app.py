@@ -135,6 +135,1101 @@ def test_settings_manager():
         print(f"✗ SettingsManager test failed: {e}")
         return False
 
+def test_duplicate_index():
+    """Test near-duplicate title detection"""
+    print("\nTesting NearDuplicateIndex...")
+    
+    try:
+        from dedupe import NearDuplicateIndex
+        index = NearDuplicateIndex()
+        
+        if not index.add("Man arrested for stealing 47 traffic cones in Ohio"):
+            print("✗ First title was rejected")
+            return False
+        
+        if index.add("Man arrested for stealing 47 traffic cones in Ohio!"):
+            print("✗ Near-duplicate title was not detected")
+            return False
+        
+        if not index.add("City council approves new budget for road repairs"):
+            print("✗ Unrelated title was treated as a duplicate")
+            return False
+        
+        print(f"✓ NearDuplicateIndex working correctly ({len(index)} unique titles)")
+        return True
+        
+    except Exception as e:
+        print(f"✗ NearDuplicateIndex test failed: {e}")
+        return False
+
+def test_content_classifier():
+    """Test funny/crime keyword classification"""
+    print("\nTesting ContentClassifier...")
+    
+    try:
+        from content_classifier import ContentClassifier
+        classifier = ContentClassifier()
+        
+        if not classifier.has_label("Man arrested after bizarre prank", 'crime'):
+            print("✗ Crime keyword not matched")
+            return False
+        
+        # Keywords must match whole words only
+        if classifier.has_label("Lawmakers define oddly specific rules", 'funny') or \
+           classifier.has_label("Lawmakers define oddly specific rules", 'crime'):
+            print("✗ Keyword matched inside another word")
+            return False
+        
+        batch = classifier.classify_batch(["Hilarious cat video", "Budget vote tonight"])
+        if 'funny' not in batch[0] or batch[1]:
+            print(f"✗ Unexpected batch results: {batch}")
+            return False
+        
+        print("✓ ContentClassifier working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ ContentClassifier test failed: {e}")
+        return False
+
+def test_topic():
+    """Test that slotted topics read like the topic dicts they replaced, and export to JSON"""
+    print("\nTesting topics...")
+    
+    try:
+        import io
+        import json
+        from datetime import datetime, timedelta
+        from scrape_topics import TopicWriter
+        from topic import Topic
+        
+        timestamp = datetime.now() - timedelta(hours=2, minutes=5)
+        topic = Topic("Man arrested for riding lawn mower to bar", "Reddit r/floridaman", "https://a",
+                      timestamp, summary="Deputies said he was polite.", score=420)
+        unscored = Topic("Village council approves new park", "salemohio.org", "https://b", timestamp)
+        
+        if topic['source'] != 'Reddit r/floridaman' or topic['time_ago'] != '2h ago':
+            print("✗ Dict-style access failed")
+            return False
+        if topic.get('score') != 420 or unscored.get('score') is not None or unscored.get('missing', 'x') != 'x':
+            print("✗ get() failed")
+            return False
+        if 'score' in unscored or 'score' not in topic or 'title' not in unscored:
+            print("✗ Key membership failed")
+            return False
+        try:
+            unscored['score']
+            print("✗ Missing score did not raise KeyError")
+            return False
+        except KeyError:
+            pass
+        if hasattr(topic, '__dict__'):
+            print("✗ Topic is not slotted")
+            return False
+        
+        # time_ago is worked out when read, so it never goes stale
+        topic.timestamp = datetime.now() - timedelta(days=3)
+        if topic['time_ago'] != '3d ago' or topic.to_dict()['time_ago'] != '3d ago':
+            print("✗ time_ago went stale")
+            return False
+        
+        stream = io.StringIO()
+        TopicWriter(stream, 'jsonl').write('Funny Criminal Stories (US National)', [topic, unscored])
+        rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+        if rows[0]['source'] != 'Reddit r/floridaman' or rows[0]['score'] != 420 or rows[1]['score'] is not None:
+            print(f"✗ JSON export wrong: {rows}")
+            return False
+        if rows[0]['timestamp'] != topic.timestamp.isoformat(timespec='seconds'):
+            print("✗ Exported timestamp wrong")
+            return False
+        
+        print("✓ Topics working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Topic test failed: {e}")
+        return False
+
+def test_search_index():
+    """Test search ranking, word-prefix matching and removal of stale topics"""
+    print("\nTesting topic search index...")
+    
+    try:
+        from datetime import datetime, timedelta
+        from search_index import TopicSearchIndex
+        from topic import Topic
+        
+        now = datetime.now()
+        budget = Topic("Ohio budget vote delayed again", "cleveland.com", "https://a", now - timedelta(hours=3))
+        summary_only = Topic("Lawmakers meet in Columbus", "dispatch.com", "https://b", now - timedelta(hours=1),
+                             summary="The budget talks went late into the night")
+        budgeting = Topic("Budgeting tips for city councils", "wfmj.com", "https://c", now)
+        newer = Topic("School budget vote passes", "vindy.com", "https://d", now - timedelta(hours=2))
+        topics = [budget, summary_only, budgeting, newer]
+        
+        index = TopicSearchIndex()
+        for topic in topics + [budget]:
+            index.add(topic)
+        if len(index) != 4:
+            print("✗ Re-added topic indexed twice")
+            return False
+        
+        # Whole-word title matches, newest first, then a prefix match, then a summary match
+        if index.search('budget') != [newer, budget, budgeting, summary_only]:
+            print(f"✗ Unexpected ranking: {index.search('budget')}")
+            return False
+        if index.search('BUDG vo') != [newer, budget]:
+            print("✗ Word prefixes not matched (every query word must match)")
+            return False
+        if index.search('udget') or index.search('budget columbus') != [summary_only]:
+            print("✗ Matched inside a word, or missed a match across fields")
+            return False
+        if index.search('  ') != topics:
+            print("✗ Empty query should list every topic")
+            return False
+        
+        # Topics trimmed from the list must not come back in searches
+        index.remove(budgeting)
+        index.remove(budgeting)
+        if budgeting in index.search('budget') or index.search('tips') or index._prefix_terms('budgeting'):
+            print("✗ Removed topic still searchable")
+            return False
+        if index.search('budget') != [newer, budget, summary_only]:
+            print("✗ Removal dropped terms other topics share")
+            return False
+        index.clear()
+        if len(index) or index.search('budget'):
+            print("✗ Index not cleared")
+            return False
+        
+        print("✓ Topic search index working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Topic search index test failed: {e}")
+        return False
+
+def test_topic_store():
+    """Test TopicStore upserts and time-window queries"""
+    print("\nTesting TopicStore...")
+    
+    try:
+        from datetime import timedelta
+        from topic_store import TopicStore
+        store = TopicStore(':memory:')
+        
+        now = datetime.now()
+        topics = [
+            {'title': 'Council approves new budget for road repairs', 'source': 'www.wfmj.com',
+             'url': 'https://www.wfmj.com/story/1?utm_source=x', 'timestamp': now - timedelta(hours=1), 'summary': ''},
+            {'title': 'Warren police search for stolen traffic cones', 'source': 'www.vindy.com',
+             'url': 'https://www.vindy.com/news/2', 'timestamp': now - timedelta(hours=10), 'summary': ''}
+        ]
+        store.upsert('Local Ohio News', topics)
+        
+        # Same article through a tracking link should update, not duplicate
+        store.upsert('Local Ohio News', [dict(topics[0], url='https://wfmj.com/story/1/')])
+        
+        last_2h = store.recent('Local Ohio News', 2)
+        last_24h = store.recent('Local Ohio News', 24)
+        if len(last_2h) != 1 or len(last_24h) != 2:
+            print(f"✗ Unexpected window results: {len(last_2h)} (2h), {len(last_24h)} (24h)")
+            return False
+        
+        if store.recent('US Political News', 24):
+            print("✗ Topics leaked into another category")
+            return False
+        
+        if len(store.by_source(['www.vindy.com'], 24)) != 1:
+            print("✗ Source query returned the wrong topics")
+            return False
+        
+        # A dated topic takes the time its source gives now; an undated one keeps the earliest scrape time
+        post = {'title': 'Deputies chase runaway cow through Boardman', 'source': 'Mahoning County Sheriff',
+                'url': 'https://www.facebook.com/MahoningSheriff/1', 'summary': ''}
+        undated = dict(post, title='Village hall closed for repairs', url='https://www.salemohio.org/news/3', dated=False)
+        store.upsert('Local Funny Stories', [dict(post, timestamp=now - timedelta(hours=40)),
+                                             dict(undated, timestamp=now - timedelta(hours=30))])
+        store.upsert('Local Funny Stories', [dict(post, timestamp=now - timedelta(hours=3)),
+                                             dict(undated, timestamp=now)])
+        titles = [topic['title'] for topic in store.recent('Local Funny Stories', 24)]
+        if titles != ['Deputies chase runaway cow through Boardman']:
+            print(f"✗ Re-scraped topic times not kept correctly: {titles}")
+            return False
+        
+        store.save_cursor('reddit:Ohio', 't3_abc', 100.0, 200.0)
+        store.save_cursor('reddit:Ohio', 't3_def', 150.0, 200.0)
+        if store.cursor('reddit:Ohio') != {'cursor': 't3_def', 'cursor_time': 150.0, 'refreshed_at': 200.0}:
+            print("✗ Saved cursor was not updated")
+            return False
+        
+        print("✓ TopicStore working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ TopicStore test failed: {e}")
+        return False
+
+def test_timestamp_parser():
+    """Test TimestampParser sources and formats"""
+    print("\nTesting TimestampParser...")
+    
+    try:
+        from datetime import timedelta
+        from timestamp_parser import TimestampParser
+        parser = TimestampParser()
+        now = datetime.now()
+        
+        if parser.parse(datetime_attr='2025-09-22T14:30:00') != datetime(2025, 9, 22, 14, 30):
+            print("✗ datetime attribute not parsed")
+            return False
+        
+        two_hours_ago = parser.parse(text='Updated 2 hours ago')
+        if two_hours_ago is None or abs(now - timedelta(hours=2) - two_hours_ago) > timedelta(minutes=1):
+            print(f"✗ Relative time parsed as {two_hours_ago}")
+            return False
+        
+        if parser.parse(text='Sep. 22, 2025 3:15 p.m. EDT', host='example.com') != datetime(2025, 9, 22, 15, 15):
+            print("✗ Formatted date not parsed")
+            return False
+        
+        if parser.parse(text='no date here', url='https://example.com/news/2025/09/22/story') != datetime(2025, 9, 22):
+            print("✗ URL date not used as a fallback")
+            return False
+        
+        print("✓ TimestampParser working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ TimestampParser test failed: {e}")
+        return False
+
+def test_cassette():
+    """Test recording a response to a cassette and replaying it"""
+    print("\nTesting HTTP cassette...")
+    
+    try:
+        import tempfile
+        import requests
+        from cassette import Cassette, CassetteAdapter
+        
+        path = os.path.join(tempfile.mkdtemp(), 'test.jsonl.gz')
+        request = requests.Request('GET', 'https://example.com/news').prepare()
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response._content = '<h1>Café owner arrested</h1>'.encode('utf-8')
+        
+        cassette = Cassette(path)
+        cassette.record(request, response, 0.25)
+        cassette.close()
+        
+        replayed = CassetteAdapter(Cassette(path), 'replay').send(request)
+        if replayed.status_code != 200 or replayed.text != response.text:
+            print("✗ Replayed response does not match the recording")
+            return False
+        
+        try:
+            CassetteAdapter(Cassette(path), 'replay').send(requests.Request('GET', 'https://example.com/other').prepare())
+            print("✗ Unrecorded request did not fail")
+            return False
+        except requests.ConnectionError:
+            pass
+        
+        # Replays cost no network time, so metrics count them with cache hits
+        import metrics
+        from metrics import ScrapeMetrics
+        from transport import SessionPool
+        pool = SessionPool()
+        pool.mount('https://', CassetteAdapter(Cassette(path), 'replay'))
+        scrape_metrics = ScrapeMetrics()
+        with scrape_metrics.source('example.com'):
+            metrics.record_request(pool.get('https://example.com/news'))
+        stats = scrape_metrics.report()['sources'][0]
+        if stats['cache_hits'] != 1 or stats['seconds']['ttfb'] != 0:
+            print(f"✗ Replayed response counted as a network request: {stats}")
+            return False
+        
+        print("✓ HTTP cassette working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ HTTP cassette test failed: {e}")
+        return False
+
+def test_prefetch_priority():
+    """Test that prefetching refreshes the most recently used categories first"""
+    print("\nTesting prefetch priority...")
+    
+    try:
+        from prefetch import category_priority
+        
+        categories = ['US Political News', 'Local Ohio News', 'Funny News', 'Crime News']
+        usage = {
+            'Funny News': {'count': 1, 'last_used': 200},
+            'Crime News': {'count': 5, 'last_used': 100}
+        }
+        order = category_priority(categories, usage, 'Local Ohio News')
+        expected = ['Local Ohio News', 'Funny News', 'Crime News', 'US Political News']
+        if order != expected:
+            print(f"✗ Unexpected prefetch order: {order}")
+            return False
+        
+        print("✓ Prefetch priority working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Prefetch priority test failed: {e}")
+        return False
+
+def test_prefetch_hold():
+    """Test that prefetching leaves a category alone while Generate Topics scrapes it"""
+    print("\nTesting prefetch hold...")
+    
+    try:
+        import threading
+        from types import SimpleNamespace
+        from prefetch import PrefetchScheduler
+        
+        refreshed = []
+        started = threading.Event()
+        finish = threading.Event()
+        
+        def refresh_categories(categories):
+            refreshed.append(list(categories))
+            started.set()
+            finish.wait(5)
+            return dict.fromkeys(categories, 0)
+        
+        fresh = set()
+        scraper = SimpleNamespace(refresh_categories=refresh_categories,
+                                  topic_store=SimpleNamespace(is_fresh=lambda category, max_age: category in fresh))
+        scheduler = PrefetchScheduler(scraper, 60, categories=['Crime News', 'Funny News'])
+        
+        # A held category is skipped by passes until it is released
+        if scheduler.hold('Crime News'):
+            print("✗ Hold waited with no pass running")
+            return False
+        finish.set()
+        scheduler.run_once()
+        scheduler.release('Crime News')
+        if refreshed != [['Funny News']]:
+            print(f"✗ Held category was prefetched: {refreshed}")
+            return False
+        
+        # Holding a category a pass is refreshing waits for that pass instead of scraping again
+        refreshed.clear()
+        started.clear()
+        finish.clear()
+        fresh.add('Funny News')
+        worker = threading.Thread(target=scheduler.run_once)
+        worker.start()
+        started.wait(5)
+        threading.Timer(0.2, finish.set).start()
+        waited = scheduler.hold('Crime News')
+        scheduler.release('Crime News')
+        worker.join(5)
+        if not waited or scheduler.refreshing is not None or refreshed != [['Crime News']]:
+            print("✗ Hold did not wait for the pass refreshing the category")
+            return False
+        
+        print("✓ Prefetch hold working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Prefetch hold test failed: {e}")
+        return False
+
+def test_fetch_retries():
+    """Test that 429s are retried after their Retry-After and single-attempt sources aren't retried"""
+    print("\nTesting fetch retries...")
+    
+    try:
+        import io
+        import time
+        import config
+        import requests
+        from fetcher import ConcurrentFetcher
+        from rate_limiter import RateLimiter
+        
+        class StubSession:
+            def __init__(self, statuses):
+                self.statuses = list(statuses)
+                self.calls = 0
+            
+            def get(self, url, **kwargs):
+                self.calls += 1
+                status = self.statuses.pop(0)
+                if status is None:
+                    raise requests.ConnectionError("name or service not known")
+                response = requests.Response()
+                response.status_code = status
+                response.url = url
+                response.raw = io.BytesIO()
+                response._content = b'ok'
+                if status == 429:
+                    response.headers['Retry-After'] = '0.2'
+                return response
+        
+        limiter = RateLimiter(request_delay=0, host_delays={})
+        if limiter.backoff_delay(0, '7') != 7 or limiter.backoff_delay(0, 'Wed, 21 Oct 2015 07:28:00 GMT') != 0:
+            print("✗ Retry-After not parsed")
+            return False
+        base = config.RETRY_BACKOFF_BASE
+        if not base / 2 <= limiter.backoff_delay(0) <= base or not base <= limiter.backoff_delay(1) <= base * 2:
+            print("✗ Unexpected exponential backoff")
+            return False
+        
+        session = StubSession([429, 200])
+        fetcher = ConcurrentFetcher(session, limiter=limiter)
+        start = time.perf_counter()
+        response = fetcher.get('https://www.cnn.com/politics')
+        if response.status_code != 200 or session.calls != 2 or time.perf_counter() - start < 0.2:
+            print("✗ 429 not retried after its Retry-After")
+            return False
+        
+        fetcher.session = session = StubSession([None, 200])
+        try:
+            fetcher.get('https://www.weirdnews.com', retries=1)
+            print("✗ Single-attempt request didn't fail")
+            return False
+        except requests.ConnectionError:
+            pass
+        if session.calls != 1:
+            print(f"✗ Single-attempt request was tried {session.calls} times")
+            return False
+        fetcher.executor.shutdown()
+        
+        print("✓ Fetch retries working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Fetch retries test failed: {e}")
+        return False
+
+def test_fetch_plan():
+    """Test that sources shared between categories are planned once"""
+    print("\nTesting fetch planner...")
+    
+    try:
+        import config
+        from scrapers import NewsScraper
+        from topic_store import TopicStore
+        scraper = NewsScraper(topic_store=TopicStore(':memory:'))
+        
+        plan = scraper._plan_sources(config.CATEGORIES)
+        separate = sum(len(scraper._category_sources(category)) for category in config.CATEGORIES)
+        jobs = [(scraper_func, args) for scraper_func, args, _ in plan]
+        if len(jobs) != len(set(jobs)) or len(plan) >= separate:
+            print(f"✗ Plan has {len(plan)} jobs for {separate} category sources")
+            return False
+        
+        # Overlapping subreddits share one combined listing; the rest keep their own
+        listings = [args[0] for scraper_func, args, _ in plan if scraper_func == scraper._scrape_reddit_subreddits]
+        funny = [subreddits for subreddits in listings if 'nottheonion' in subreddits]
+        if len(funny) != 1 or set(funny[0]) != {'funny', 'nottheonion'} or ('floridaman',) not in listings:
+            print(f"✗ Unexpected combined Reddit listings: {listings}")
+            return False
+        if ('politics', 'conservative') not in listings or ('youngstown',) not in listings:
+            print(f"✗ Unexpected combined Reddit listings: {listings}")
+            return False
+        
+        print(f"✓ Fetch planner working correctly ({len(plan)} jobs instead of {separate})")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Fetch planner test failed: {e}")
+        return False
+
+def test_small_subreddit_listing():
+    """Test that posts from a low-volume subreddit reach its categories next to busy subreddits"""
+    print("\nTesting low-volume subreddit listings...")
+    
+    try:
+        import time
+        from urllib.parse import parse_qs, urlparse
+        from reddit import RedditClient
+        from scrapers import NewsScraper
+        from topic_store import TopicStore
+        
+        now = time.time()
+        volumes = {'funny': (400, 5000), 'nottheonion': (400, 3000), 'FloridaMan': (10, 40)}
+        subreddit_posts = {
+            subreddit: [{'data': {'name': f't3_{subreddit}{i}', 'subreddit': subreddit,
+                                  'title': f'{subreddit} post number {i} of the day', 'score': score - i,
+                                  'created_utc': now - 3600, 'permalink': f'/r/{subreddit}/comments/{i}/'}}
+                        for i in range(count)]
+            for subreddit, (count, score) in volumes.items()
+        }
+        
+        class StubResponse:
+            status_code = 200
+            
+            def __init__(self, children, after):
+                self.children = children
+                self.after = after
+            
+            def json(self):
+                return {'data': {'children': self.children, 'after': self.after}}
+        
+        class StubFetcher:
+            """A hot listing: the combined subreddits' posts by score, a page at a time"""
+            def get(self, url, **kwargs):
+                parsed = urlparse(url)
+                subreddits = parsed.path.split('/')[2].split('+')
+                query = parse_qs(parsed.query)
+                listing = sorted((post for subreddit in subreddits for post in subreddit_posts[subreddit]),
+                                 key=lambda post: -post['data']['score'])
+                start = int(query.get('after', ['0'])[0])
+                limit = int(query['limit'][0])
+                after = str(start + limit) if start + limit < len(listing) else None
+                return StubResponse(listing[start:start + limit], after)
+        
+        scraper = NewsScraper(topic_store=TopicStore(':memory:'), reddit_incremental=False)
+        scraper.reddit = RedditClient(StubFetcher())
+        category = 'Funny Criminal Stories (US National)'
+        
+        topics = []
+        for scraper_func, args, consumers in scraper._plan_sources(['Funny Stories (US National)', category]):
+            if scraper_func != scraper._scrape_reddit_subreddits:
+                continue
+            fetched = scraper_func(*args)
+            for consumer, _, only_sources in consumers:
+                if consumer == category:
+                    topics.extend(t for t in fetched if only_sources is None or t['source'] in only_sources)
+        
+        floridaman = [t for t in topics if t['source'] == 'Reddit r/floridaman']
+        if len(floridaman) != 10:
+            print(f"✗ {len(floridaman)} of 10 FloridaMan posts reached {category}")
+            return False
+        
+        print("✓ Low-volume subreddit listings working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Low-volume subreddit listing test failed: {e}")
+        return False
+
+def test_reddit_cursor():
+    """Test that a deleted Reddit cursor post falls back to a full listing, and cursors are kept per category set"""
+    print("\nTesting Reddit cursors...")
+    
+    try:
+        import time
+        from reddit import RedditClient
+        from scrapers import NewsScraper
+        from topic_store import TopicStore
+        
+        now = time.time()
+        hot_posts = [{'data': {'name': 't3_new', 'subreddit': 'Ohio', 'title': 'Ohio lawmakers debate new budget plan',
+                               'score': 50, 'created_utc': now - 7200, 'permalink': '/r/Ohio/comments/new/'}}]
+        requested = []
+        
+        class StubResponse:
+            status_code = 200
+            
+            def __init__(self, children):
+                self.children = children
+            
+            def json(self):
+                return {'data': {'children': self.children, 'after': None}}
+        
+        class StubFetcher:
+            def get(self, url, **kwargs):
+                requested.append(url)
+                if '/by_id/' in url:
+                    return StubResponse([])  # the cursor post was deleted
+                if 'before=' in url:
+                    return StubResponse([])  # so Reddit pages before it come back empty
+                return StubResponse(hot_posts)
+        
+        scraper = NewsScraper(topic_store=TopicStore(':memory:'))
+        scraper.reddit = RedditClient(StubFetcher())
+        key = 'reddit:Ohio:Ohio Political News'
+        scraper.topic_store.save_cursor(key, 't3_gone', now - 5 * 3600, now)
+        
+        topics = scraper._scrape_reddit_subreddits(('ohio',), ('Ohio Political News',))
+        if [t['title'] for t in topics] != ['Ohio lawmakers debate new budget plan']:
+            print(f"✗ No full listing after the cursor post was deleted: {requested}")
+            return False
+        if scraper.topic_store.cursor(key)['cursor'] != 't3_new':
+            print("✗ Cursor not moved past the deleted post")
+            return False
+        
+        # Another set of categories reading the same listing starts with its own full fetch
+        requested.clear()
+        scraper._scrape_reddit_subreddits(('ohio',), ('Ohio Political News', 'US Political News'))
+        if any('before=' in url for url in requested):
+            print("✗ New category set reused another cursor")
+            return False
+        
+        print("✓ Reddit cursors working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Reddit cursor test failed: {e}")
+        return False
+
+def test_session_pool():
+    """Test that each thread gets its own session over shared connection pools"""
+    print("\nTesting session pool...")
+    
+    try:
+        import threading
+        from transport import SessionPool
+        pool = SessionPool({'User-Agent': 'ScriptWriter test'})
+        
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(pool.session))
+        thread.start()
+        thread.join()
+        
+        if sessions[0] is pool.session:
+            print("✗ Threads share a session")
+            return False
+        if sessions[0].get_adapter('https://example.com') is not pool.session.get_adapter('https://example.com'):
+            print("✗ Sessions don't share connection pools")
+            return False
+        if 'gzip' not in pool.session.headers['Accept-Encoding'] or pool.session.headers['User-Agent'] != 'ScriptWriter test':
+            print("✗ Session headers not applied")
+            return False
+        
+        print("✓ Session pool working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Session pool test failed: {e}")
+        return False
+
+def test_listing_parity():
+    """Test that the lxml listing extractor finds the same headlines as the old BeautifulSoup code"""
+    print("\nTesting listing extraction parity...")
+    
+    try:
+        import re
+        from bs4 import BeautifulSoup
+        from extraction import NEWS_LISTING
+        
+        fixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'www.cnn.com', 'politics')
+        with open(fixture, 'rb') as f:
+            page = f.read()
+        
+        # The news site parsing NewsScraper used before the lxml extractor
+        soup = BeautifulSoup(page, 'html.parser')
+        articles = []
+        articles.extend(soup.find_all('article'))
+        articles.extend(soup.find_all('div', class_=re.compile(r'article|story|news|post|item')))
+        articles.extend(soup.find_all('div', class_=re.compile(r'headline|title|content')))
+        articles.extend(soup.find_all('a', href=re.compile(r'/(article|news|story|post)/')))
+        expected = []
+        for article in articles[:30]:
+            link = article.find('a', href=True)
+            title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'h5'])
+            if link and title_elem:
+                expected.append((title_elem.get_text(strip=True), link['href']))
+        
+        extracted = [(entry['title'], entry['href']) for entry in NEWS_LISTING.extract(page)]
+        
+        # Both then drop short and repeated titles the same way
+        def kept(headlines):
+            seen = set()
+            return [(title, href) for title, href in headlines
+                    if len(title) >= 10 and not (title in seen or seen.add(title))]
+        
+        if not expected or kept(extracted) != kept(expected):
+            print(f"✗ Headlines differ: {len(kept(extracted))} extracted, {len(kept(expected))} from BeautifulSoup")
+            return False
+        
+        # Pages that declare no charset are decoded the way BeautifulSoup decoded them
+        headline = 'Café owner’s “lucky” lottery ticket — found in the laundry'
+        for encoding in ('utf-8', 'cp1252'):
+            page = f'<html><body><article><h3><a href="/story/1">{headline}</a></h3></article></body></html>'
+            decoded = BeautifulSoup(page.encode(encoding), 'html.parser').h3.get_text(strip=True)
+            titles = [entry['title'] for entry in NEWS_LISTING.extract(page.encode(encoding))]
+            if titles != [decoded] or decoded != headline:
+                print(f"✗ Undeclared {encoding} page decoded as {titles}")
+                return False
+        
+        print(f"✓ Listing extraction parity working correctly ({len(kept(expected))} headlines)")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Listing extraction parity test failed: {e}")
+        return False
+
+def test_listing_stream():
+    """Test that streamed listing extraction stops reading once it has enough headlines"""
+    print("\nTesting streamed listing extraction...")
+    
+    try:
+        from extraction import NEWS_LISTING
+        
+        page = b'<html><body><nav>Menu</nav>' + b''.join(
+            b'<article><h3><a href="/story/%d">Headline number %d for testing</a></h3></article>' % (i, i)
+            for i in range(100)) + b'</body></html>'
+        chunks_read = []
+        
+        def chunks():
+            for start in range(0, len(page), 500):
+                chunks_read.append(start)
+                yield page[start:start + 500]
+        
+        streamed = NEWS_LISTING.extract_stream(chunks())
+        expected = NEWS_LISTING.extract(page)
+        if [e['title'] for e in streamed] != [e['title'] for e in expected]:
+            print("✗ Streamed headlines differ from a full parse")
+            return False
+        if len(chunks_read) * 500 >= len(page):
+            print("✗ Whole page was read")
+            return False
+        
+        print(f"✓ Streamed extraction working correctly ({len(chunks_read) * 500} of {len(page)} bytes read)")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Streamed extraction test failed: {e}")
+        return False
+
+def test_cache_revalidation():
+    """Test that a cached page is revalidated with If-None-Match and a 304 serves the cached body"""
+    print("\nTesting response cache revalidation...")
+    
+    try:
+        import io
+        import tempfile
+        import requests
+        from fetcher import ConcurrentFetcher
+        from metrics import ScrapeMetrics
+        from rate_limiter import RateLimiter
+        from response_cache import ResponseCache
+        
+        class StubSession:
+            def __init__(self):
+                self.sent = []
+            
+            def get(self, url, headers=None, **kwargs):
+                headers = headers or {}
+                self.sent.append(headers)
+                response = requests.Response()
+                response.url = url
+                response.raw = io.BytesIO()
+                if headers.get('If-None-Match') == '"v1"':
+                    response.status_code = 304
+                else:
+                    response.status_code = 200
+                    response.headers['ETag'] = '"v1"'
+                    response._content = b'<html><body>Salem council meeting</body></html>'
+                return response
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            session = StubSession()
+            cache = ResponseCache(cache_dir, ttl=0)  # every lookup revalidates
+            fetcher = ConcurrentFetcher(session, cache=cache, limiter=RateLimiter(request_delay=0, host_delays={}))
+            
+            fetcher.get('https://www.salemohio.org')
+            response = fetcher.get('https://www.salemohio.org')
+            fetcher.executor.shutdown()
+            if session.sent[-1].get('If-None-Match') != '"v1"':
+                print("✗ Cached page not revalidated with If-None-Match")
+                return False
+            if response.status_code != 200 or response.content != b'<html><body>Salem council meeting</body></html>':
+                print(f"✗ 304 did not serve the cached body (status {response.status_code})")
+                return False
+            
+            scrape_metrics = ScrapeMetrics(cache=cache)
+            stats = scrape_metrics.report()['response_cache']
+            if (stats['hits'], stats['revalidated'], stats['misses']) != (0, 1, 1) or stats['bytes_saved'] != len(response.content):
+                print(f"✗ Cache counters wrong: {stats}")
+                return False
+            if 'scriptwriter_response_cache_lookups_total{result="revalidated"} 1' not in scrape_metrics.prometheus_text():
+                print("✗ Prometheus text missing cache counters")
+                return False
+        
+        print("✓ Response cache revalidation working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Response cache revalidation test failed: {e}")
+        return False
+
+def test_stream_cache():
+    """Test that a streamed page is cached when the parser stops reading, but not when the download fails"""
+    print("\nTesting streamed response caching...")
+    
+    try:
+        import io
+        import tempfile
+        import requests
+        from fetcher import ConcurrentFetcher
+        from rate_limiter import RateLimiter
+        from response_cache import ResponseCache
+        
+        class StubSession:
+            fail = False
+            
+            def get(self, url, **kwargs):
+                response = requests.Response()
+                response.status_code = 200
+                response.url = url
+                response.headers['ETag'] = '"v1"'
+                response.raw = io.BytesIO()
+                return response
+            
+            def iter_content(self, response, chunk_size):
+                yield b'<html><body>first part'
+                if self.fail:
+                    raise requests.exceptions.ChunkedEncodingError("connection reset")
+                yield b' second part</body></html>'
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            session = StubSession()
+            cache = ResponseCache(cache_dir)
+            fetcher = ConcurrentFetcher(session, cache=cache, limiter=RateLimiter(request_delay=0, host_delays={}))
+            
+            session.fail = True
+            response = fetcher.get('https://www.wfmj.com/', stream=True)
+            try:
+                list(fetcher.iter_body(response))
+            except requests.exceptions.ChunkedEncodingError:
+                pass
+            if cache.lookup('https://www.wfmj.com/') is not None:
+                print("✗ Failed download was cached")
+                return False
+            
+            # Stopping early on purpose keeps what was read
+            session.fail = False
+            response = fetcher.get('https://www.wfmj.com/', stream=True)
+            if not fetcher._host_lock('www.wfmj.com').locked():
+                print("✗ Host unlocked before the streamed body was read")
+                return False
+            body = fetcher.iter_body(response)
+            next(body)
+            body.close()
+            if fetcher._host_lock('www.wfmj.com').locked():
+                print("✗ Host still locked after the stream was closed")
+                return False
+            entry = cache.lookup('https://www.wfmj.com/')
+            if entry is None or entry[1] != b'<html><body>first part':
+                print("✗ Page read until the parser stopped was not cached")
+                return False
+            fetcher.executor.shutdown()
+        
+        print("✓ Streamed response caching working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Streamed response caching test failed: {e}")
+        return False
+
+def test_scrape_metrics():
+    """Test that per-source metrics are recorded and exported"""
+    print("\nTesting scrape metrics...")
+    
+    try:
+        import metrics
+        from types import SimpleNamespace
+        from metrics import ScrapeMetrics
+        scrape_metrics = ScrapeMetrics()
+        
+        timings = {'dns': 0.01, 'connect': 0.02, 'tls': 0.03, 'ttfb': 0.1, 'total': 0.2,
+                   'wire_bytes': 100, 'body_bytes': 400}
+        with scrape_metrics.source('r/politics+conservative') as result:
+            metrics.record_request(SimpleNamespace(status_code=200, timings=timings))
+            metrics.record_request(SimpleNamespace(status_code=200))  # served from the cache
+            metrics.record_error()
+            result['topics'] = 5
+        metrics.record_request(SimpleNamespace(status_code=500, timings=timings))  # outside any source
+        scrape_metrics.record_category('US Political News', 'r/politics+conservative', 5, 3, 2)
+        
+        stats = scrape_metrics.report()['sources'][0]
+        if (stats['requests'], stats['cache_hits'], stats['errors'], stats['topics']) != (2, 1, 1, 5):
+            print(f"✗ Source counts wrong: {stats}")
+            return False
+        if stats['wire_bytes'] != 100 or stats['seconds']['tls'] != 0.03:
+            print("✗ Request timings not recorded")
+            return False
+        
+        text = scrape_metrics.prometheus_text()
+        if 'scriptwriter_source_requests_total{source="r/politics+conservative",status="200"} 2' not in text:
+            print("✗ Prometheus text missing request counts")
+            return False
+        if 'stage="matched"} 2' not in text:
+            print("✗ Prometheus text missing category counts")
+            return False
+        if metrics._escape_label('say "hi"\\') != 'say \\"hi\\"\\\\':
+            print("✗ Label values not escaped")
+            return False
+        
+        print("✓ Scrape metrics working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Scrape metrics test failed: {e}")
+        return False
+
+def test_profiling():
+    """Test that profiled actions write a pstats file and memory report, and nested hooks are counted"""
+    print("\nTesting profiling hooks...")
+    
+    try:
+        import pstats
+        import tempfile
+        from profiling import Profiler
+        
+        with tempfile.TemporaryDirectory() as output_dir:
+            profiler = Profiler(enabled=False, output_dir=output_dir)
+            with profiler.profile('disabled'):
+                pass
+            if os.listdir(output_dir):
+                print("✗ Disabled profiler wrote files")
+                return False
+            
+            profiler.enabled = True
+            with profiler.profile('helper', standalone=False):
+                pass  # outside a run, so not written
+            with profiler.profile('scrape category'):
+                for _ in range(3):
+                    with profiler.profile('helper', standalone=False):
+                        sorted(str(i) for i in range(1000))
+            
+            files = sorted(os.listdir(output_dir))
+            if len(files) != 2 or not files[0].endswith('-scrape-category.pstats'):
+                print(f"✗ Unexpected profile files: {files}")
+                return False
+            pstats.Stats(os.path.join(output_dir, files[0]))
+            with open(os.path.join(output_dir, files[1]), encoding='utf-8') as f:
+                report = f.read()
+            if 'helper' not in report or 'allocations' not in report:
+                print("✗ Memory report missing hooks or allocations")
+                return False
+        
+        print("✓ Profiling hooks working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Profiling test failed: {e}")
+        return False
+
+def test_circuit_breaker():
+    """Test that a failing host is skipped, probed after its cooldown and remembered across runs"""
+    print("\nTesting circuit breaker...")
+    
+    try:
+        import tempfile
+        import time
+        from circuit_breaker import CircuitBreaker, CircuitOpenError
+        
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_file = os.path.join(state_dir, 'circuit_breaker.json')
+            breaker = CircuitBreaker(state_file, threshold=2, cooldown=60)
+            host = 'www.weirdnews.com'
+            
+            breaker.allow(host)
+            breaker.record_failure(host)
+            breaker.allow(host)  # one failure isn't enough
+            breaker.record_failure(host)
+            
+            reloaded = CircuitBreaker(state_file, threshold=2, cooldown=60)
+            for current in (breaker, reloaded):
+                try:
+                    current.allow(host)
+                    print("✗ Open circuit let a request through")
+                    return False
+                except CircuitOpenError:
+                    pass
+            
+            # Once the cooldown is over, exactly one probe goes through
+            reloaded._hosts[host]['opened_at'] -= 61
+            reloaded.allow(host)
+            try:
+                reloaded.allow(host)
+                print("✗ Second probe let through")
+                return False
+            except CircuitOpenError:
+                pass
+            reloaded.record_failure(host)
+            if reloaded.state(host)['retry_at'] - time.time() < 100:
+                print("✗ Cooldown not extended after a failed probe")
+                return False
+            
+            reloaded._hosts[host]['opened_at'] -= 121
+            reloaded.allow(host)
+            reloaded.record_success(host)
+            if reloaded.state(host) is not None or CircuitBreaker(state_file).state(host) is not None:
+                print("✗ Successful probe didn't close the circuit")
+                return False
+            
+            # Processes sharing the state file (e.g. the app and prefetch.py) keep each other's hosts
+            app, daemon = CircuitBreaker(state_file, threshold=1), CircuitBreaker(state_file, threshold=1)
+            app.record_failure('www.crimeonline.com')
+            daemon.record_failure('www.salemohio.org')
+            shared = CircuitBreaker(state_file)
+            if shared.state('www.crimeonline.com') is None or shared.state('www.salemohio.org') is None:
+                print("✗ One process's save dropped another's failing host")
+                return False
+            if daemon.state('www.crimeonline.com') is None:
+                print("✗ Saving didn't pick up another process's failing host")
+                return False
+        
+        print("✓ Circuit breaker working correctly")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Circuit breaker test failed: {e}")
+        return False
+
+def test_adaptive_timeouts():
+    """Test that per-host timeouts follow latency history, widen on retries and persist"""
+    print("\nTesting adaptive timeouts...")
+    
+    try:
+        import tempfile
+        from adaptive_timeout import AdaptiveTimeouts
+        
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_file = os.path.join(state_dir, 'host_latency.json')
+            timeouts = AdaptiveTimeouts(state_file, min_samples=5, limits={'connect': (1.0, 10.0), 'read': (2.0, 30.0)})
+            host = 'www.cnn.com'
+            
+            if timeouts.timeout(host, 15) != (15, 15):
+                print("✗ Flat timeout not used without history")
+                return False
+            
+            for read in (0.5, 0.8, 1.2, 0.6, 3.0):
+                timeouts.record(host, {'dns': 0.01, 'connect': 0.02, 'tls': 0.07, 'ttfb': 0.1 + read})
+            timeouts.record(host, None)  # cached responses carry no timings
+            
+            connect, read = timeouts.timeout(host, 15)
+            if connect != 1.0 or abs(read - 6.0) > 0.01:
+                print(f"✗ Unexpected deadlines: {(connect, read)}")
+                return False
+            if timeouts.timeout(host, 15, attempt=1)[1] != 12.0 or timeouts.timeout(host, 15, attempt=3)[1] != 30.0:
+                print("✗ Retries don't widen the deadline up to the ceiling")
+                return False
+            
+            timeouts.save()
+            if AdaptiveTimeouts(state_file, min_samples=5).timeout(host, 15) != (connect, read):
+                print("✗ Latency history not persisted")
+                return False
+            
+            # Another process saving its own samples adds to the history instead of replacing it
+            daemon = AdaptiveTimeouts(state_file, min_samples=1)
+            timeouts.record(host, {'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'ttfb': 0.4})
+            daemon.record('www.wfmj.com', {'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'ttfb': 0.9})
+            timeouts.save()
+            daemon.save()
+            history = AdaptiveTimeouts(state_file)._hosts
+            if len(history[host]['read']) != 6 or history['www.wfmj.com']['read'] != [0.9]:
+                print("✗ Saves from two processes didn't merge")
+                return False
+        
+        print(f"✓ Adaptive timeouts working correctly (connect {connect}s, read {read}s)")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Adaptive timeouts test failed: {e}")
+        return False
+
 def test_chrome_driver():
     """Test if Chrome driver can be initialized"""
     print("\nTesting Chrome driver...")
@@ -196,6 +1291,28 @@ def main():
         ("Local Module Tests", test_local_modules),
         ("Directory Tests", test_directories),
         ("Settings Manager Tests", test_settings_manager),
+        ("Duplicate Index Tests", test_duplicate_index),
+        ("Content Classifier Tests", test_content_classifier),
+        ("Topic Tests", test_topic),
+        ("Search Index Tests", test_search_index),
+        ("Topic Store Tests", test_topic_store),
+        ("Timestamp Parser Tests", test_timestamp_parser),
+        ("HTTP Cassette Tests", test_cassette),
+        ("Prefetch Priority Tests", test_prefetch_priority),
+        ("Prefetch Hold Tests", test_prefetch_hold),
+        ("Fetch Retry Tests", test_fetch_retries),
+        ("Fetch Planner Tests", test_fetch_plan),
+        ("Low-Volume Subreddit Tests", test_small_subreddit_listing),
+        ("Reddit Cursor Tests", test_reddit_cursor),
+        ("Session Pool Tests", test_session_pool),
+        ("Listing Parity Tests", test_listing_parity),
+        ("Streamed Extraction Tests", test_listing_stream),
+        ("Cache Revalidation Tests", test_cache_revalidation),
+        ("Streamed Cache Tests", test_stream_cache),
+        ("Scrape Metrics Tests", test_scrape_metrics),
+        ("Profiling Tests", test_profiling),
+        ("Circuit Breaker Tests", test_circuit_breaker),
+        ("Adaptive Timeout Tests", test_adaptive_timeouts),
         ("News Scraper Tests", test_news_scraper),
         ("Chrome Driver Tests", test_chrome_driver)
     ]
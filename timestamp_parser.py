@@ -0,0 +1,151 @@
+import re
+from datetime import datetime, timedelta
+
+
+class TimestampParser:
+    """Parses publish times from datetime attributes, page text and article URLs.
+
+    The format that last worked for each host is tried first, so pages from the
+    same site usually parse in a single attempt.
+    """
+
+    FORMATS = [
+        '%Y-%m-%d %H:%M:%S',
+        '%Y-%m-%d %H:%M',
+        '%Y-%m-%d',
+        '%m/%d/%Y %I:%M %p',
+        '%m/%d/%Y',
+        '%m/%d/%y',
+        '%B %d, %Y %I:%M %p',
+        '%B %d, %Y',
+        '%b %d, %Y %I:%M %p',
+        '%b %d, %Y',
+        '%d %B %Y',
+        '%d %b %Y',
+        '%A, %B %d, %Y',
+        '%I:%M %p %B %d, %Y',
+        '%B %d',
+        '%b %d'
+    ]
+
+    RELATIVE_UNITS = {
+        'second': 'seconds', 'sec': 'seconds', 's': 'seconds',
+        'minute': 'minutes', 'min': 'minutes', 'm': 'minutes',
+        'hour': 'hours', 'hr': 'hours', 'h': 'hours',
+        'day': 'days', 'd': 'days',
+        'week': 'weeks', 'wk': 'weeks', 'w': 'weeks'
+    }
+
+    RELATIVE_PATTERN = re.compile(
+        r'\b(\d+|an?|one)\s*(seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?|wks?|[smhdw])\b\.?(?:\s+ago)?',
+        re.IGNORECASE)
+    URL_DATE_PATTERN = re.compile(r'/(20\d{2})[/-](\d{1,2})[/-](\d{1,2})(?:/|-|$)')
+
+    # Labels and time zones around the date itself ("Updated 3:15 PM EDT")
+    NOISE_PATTERN = re.compile(
+        r'^\s*(published|updated|posted|last updated|on)\s*:?\s*|'
+        r'\s+(ET|EST|EDT|CT|CST|CDT|PT|PST|PDT|UTC|GMT)\b\.?\s*$|\s*\|.*$',
+        re.IGNORECASE)
+
+    def __init__(self):
+        self._host_formats = {}
+
+    def parse(self, text=None, datetime_attr=None, url=None, host=None):
+        """Get a naive local datetime from whichever source works first, or None"""
+        if datetime_attr:
+            timestamp = self.parse_iso(datetime_attr)
+            if timestamp:
+                return timestamp
+
+        if text:
+            text = self.clean(text)
+            timestamp = self.parse_relative(text) or self.parse_iso(text) or self.parse_text(text, host)
+            if timestamp:
+                return timestamp
+
+        if url:
+            return self.parse_url(url)
+
+        return None
+
+    def clean(self, text):
+        """Drop labels and time zone names around a displayed date"""
+        return self.NOISE_PATTERN.sub('', ' '.join(text.split()))
+
+    def parse_iso(self, value):
+        """Parse an ISO 8601 timestamp such as a <time datetime=...> attribute"""
+        value = value.strip()
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        try:
+            timestamp = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return self._to_local(timestamp)
+
+    def parse_relative(self, text):
+        """Parse phrases like '2 hours ago', '5m', 'yesterday' or 'just now'"""
+        lowered = text.strip().lower()
+        now = datetime.now()
+
+        if lowered in ('just now', 'now', 'moments ago', 'a moment ago'):
+            return now
+        if lowered.startswith('yesterday'):
+            return now - timedelta(days=1)
+
+        match = self.RELATIVE_PATTERN.fullmatch(lowered)
+        if not match:
+            return None
+
+        amount, unit = match.groups()
+        amount = 1 if amount in ('a', 'an', 'one') else int(amount)
+        unit = unit.rstrip('s') if len(unit) > 1 else unit
+        return now - timedelta(**{self.RELATIVE_UNITS[unit]: amount})
+
+    def parse_text(self, text, host=None):
+        """Parse a formatted date, trying the format last used for this host first"""
+        # AP style abbreviations: 'Sept. 22' -> 'Sep 22'
+        cleaned = text.replace('.', '').replace('Sept ', 'Sep ')
+
+        known_format = self._host_formats.get(host)
+        formats = self.FORMATS
+        if known_format:
+            formats = [known_format] + [fmt for fmt in self.FORMATS if fmt != known_format]
+
+        for fmt in formats:
+            try:
+                timestamp = datetime.strptime(cleaned, fmt)
+            except ValueError:
+                continue
+
+            if host:
+                self._host_formats[host] = fmt
+            if '%Y' not in fmt and '%y' not in fmt:
+                timestamp = self._assume_year(timestamp)
+            return timestamp
+
+        return None
+
+    def parse_url(self, url):
+        """Get the date from article URLs like /2025/09/22/story-name"""
+        match = self.URL_DATE_PATTERN.search(url)
+        if not match:
+            return None
+        try:
+            return datetime(*(int(part) for part in match.groups()))
+        except ValueError:
+            return None
+
+    def _assume_year(self, timestamp):
+        """Give a year-less date the most recent year that doesn't put it in the future"""
+        now = datetime.now()
+        timestamp = timestamp.replace(year=now.year)
+        if timestamp > now + timedelta(days=1):
+            timestamp = timestamp.replace(year=now.year - 1)
+        return timestamp
+
+    def _to_local(self, timestamp):
+        """Convert aware datetimes to naive local time, like the rest of the scraper"""
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        return timestamp
@@ -0,0 +1,73 @@
+import sys
+from datetime import datetime
+
+
+def format_time_ago(timestamp):
+    """Get human-readable time ago string"""
+    diff = datetime.now() - timestamp
+
+    if diff.days > 0:
+        return f"{diff.days}d ago"
+    elif diff.seconds > 3600:
+        hours = diff.seconds // 3600
+        return f"{hours}h ago"
+    elif diff.seconds > 60:
+        minutes = diff.seconds // 60
+        return f"{minutes}m ago"
+    else:
+        return "Just now"
+
+
+class Topic:
+    """A scraped topic.
+
+    Slotted to keep large archives small, with source names interned so every
+    topic from a source shares one string. Supports read-only dict-style access
+    (topic['title'], topic.get('time_ago')) for code written against topic dicts.
+    dated is False when the source gave no publish time and timestamp is the
+    time it was scraped.
+    """
+
+    __slots__ = ('title', 'source', 'url', 'timestamp', 'summary', 'score', 'dated')
+
+    KEYS = ('title', 'source', 'url', 'timestamp', 'time_ago', 'summary', 'score', 'dated')
+
+    def __init__(self, title, source, url, timestamp, summary='', score=None, dated=True):
+        self.title = title
+        self.source = sys.intern(source)
+        self.url = url
+        self.timestamp = timestamp
+        self.summary = summary
+        self.score = score
+        self.dated = dated
+
+    @property
+    def time_ago(self):
+        """Computed when displayed, so it never goes stale"""
+        return format_time_ago(self.timestamp)
+
+    def __getitem__(self, key):
+        if key not in self.KEYS or (key == 'score' and self.score is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key in self.KEYS if key != 'score' or self.score is not None]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Topic({self.title!r}, {self.source!r}, {self.timestamp:%Y-%m-%d %H:%M})"
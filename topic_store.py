@@ -0,0 +1,216 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+import config
+from topic import Topic
+
+
+class TopicStore:
+    """Persistent SQLite store of scraped topics, indexed by time, source and category"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS topics (
+            id INTEGER PRIMARY KEY,
+            canonical_url TEXT NOT NULL,
+            title_hash TEXT NOT NULL,
+            title TEXT NOT NULL,
+            source TEXT NOT NULL,
+            url TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            summary TEXT NOT NULL,
+            score INTEGER,
+            last_seen REAL NOT NULL,
+            UNIQUE (canonical_url, title_hash)
+        );
+        CREATE INDEX IF NOT EXISTS idx_topics_timestamp ON topics (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_topics_source ON topics (source, timestamp);
+
+        CREATE TABLE IF NOT EXISTS topic_categories (
+            category TEXT NOT NULL,
+            topic_id INTEGER NOT NULL REFERENCES topics (id) ON DELETE CASCADE,
+            timestamp REAL NOT NULL,
+            PRIMARY KEY (category, topic_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_topic_categories_timestamp ON topic_categories (category, timestamp);
+
+        CREATE TABLE IF NOT EXISTS category_scrapes (
+            category TEXT PRIMARY KEY,
+            scraped_at REAL NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS source_cursors (
+            source TEXT PRIMARY KEY,
+            cursor TEXT NOT NULL,
+            cursor_time REAL NOT NULL,
+            refreshed_at REAL NOT NULL
+        );
+    """
+
+    # Query parameters that only track where a click came from
+    TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|cmpid|ref|src)$', re.IGNORECASE)
+
+    def __init__(self, db_file=config.TOPIC_DB_FILE):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+
+        # One connection shared by the scraper threads, serialized by the lock
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+
+        self.prune(config.TOPIC_RETENTION_DAYS)
+
+    def upsert(self, category, topics):
+        """Insert topics for a category, updating the ones already stored"""
+        now = time.time()
+        with self._lock, self.conn:
+            for topic in topics:
+                canonical_url = self.canonical_url(topic['url'])
+                title_hash = self.title_hash(topic['title'])
+                timestamp = topic['timestamp'].timestamp()
+
+                # Undated topics are stamped with the scrape time, so the earliest
+                # time we saw one is the best guess at when it was published; a
+                # dated topic takes the time its source gives now
+                self.conn.execute("""
+                    INSERT INTO topics (canonical_url, title_hash, title, source, url, timestamp, summary, score, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (canonical_url, title_hash) DO UPDATE SET
+                        title = excluded.title,
+                        summary = excluded.summary,
+                        score = COALESCE(excluded.score, topics.score),
+                        timestamp = CASE WHEN ? THEN excluded.timestamp
+                                         ELSE MIN(topics.timestamp, excluded.timestamp) END,
+                        last_seen = excluded.last_seen
+                """, (canonical_url, title_hash, topic['title'], topic['source'], topic['url'],
+                      timestamp, topic.get('summary', ''), topic.get('score'), now, topic.get('dated', True)))
+
+                row = self.conn.execute(
+                    "SELECT id, timestamp FROM topics WHERE canonical_url = ? AND title_hash = ?",
+                    (canonical_url, title_hash)).fetchone()
+                self.conn.execute("""
+                    INSERT INTO topic_categories (category, topic_id, timestamp) VALUES (?, ?, ?)
+                    ON CONFLICT (category, topic_id) DO UPDATE SET timestamp = excluded.timestamp
+                """, (category, row['id'], row['timestamp']))
+
+    def mark_scraped(self, category):
+        """Record that a category was just scraped from the network"""
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO category_scrapes (category, scraped_at) VALUES (?, ?)
+                ON CONFLICT (category) DO UPDATE SET scraped_at = excluded.scraped_at
+            """, (category, time.time()))
+
+    def last_scraped(self, category):
+        """Get when a category was last scraped from the network, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT scraped_at FROM category_scrapes WHERE category = ?", (category,)).fetchone()
+        return datetime.fromtimestamp(row['scraped_at']) if row else None
+
+    def is_fresh(self, category, max_age=config.TOPIC_STORE_MAX_AGE):
+        """Check if a category was scraped recently enough to answer from the store"""
+        last_scraped = self.last_scraped(category)
+        return last_scraped is not None and datetime.now() - last_scraped < timedelta(seconds=max_age)
+
+    def recent(self, category, hours, newer_than=None):
+        """Get a category's topics from the last `hours` hours, newest first.
+
+        newer_than (hours) excludes the most recent part of the range, so
+        widening windows can fetch only what the previous window didn't cover.
+        """
+        now = datetime.now()
+        start = (now - timedelta(hours=hours)).timestamp()
+        end = (now - timedelta(hours=newer_than)).timestamp() if newer_than is not None else float('inf')
+
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT t.* FROM topic_categories c JOIN topics t ON t.id = c.topic_id
+                WHERE c.category = ? AND c.timestamp >= ? AND c.timestamp < ?
+                ORDER BY c.timestamp DESC, t.id
+            """, (category, start, end)).fetchall()
+
+        return [self._row_to_topic(row) for row in rows]
+
+    def by_source(self, sources, hours):
+        """Get the topics from any of the given sources in the last `hours` hours, newest first"""
+        start = (datetime.now() - timedelta(hours=hours)).timestamp()
+        placeholders = ', '.join('?' * len(sources))
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT * FROM topics WHERE source IN ({placeholders}) AND timestamp >= ?
+                ORDER BY timestamp DESC, id
+            """, (*sources, start)).fetchall()
+
+        return [self._row_to_topic(row) for row in rows]
+
+    def cursor(self, source):
+        """Get a source's saved position for incremental fetching, as a dict, or None.
+
+        cursor is the source's own marker (e.g. a Reddit fullname), cursor_time
+        the unix time of the item it points at and refreshed_at when the
+        stored items were last fetched again in full.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT cursor, cursor_time, refreshed_at FROM source_cursors WHERE source = ?",
+                (source,)).fetchone()
+        return dict(row) if row else None
+
+    def save_cursor(self, source, cursor, cursor_time, refreshed_at):
+        """Save a source's position for incremental fetching"""
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO source_cursors (source, cursor, cursor_time, refreshed_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (source) DO UPDATE SET
+                    cursor = excluded.cursor,
+                    cursor_time = excluded.cursor_time,
+                    refreshed_at = excluded.refreshed_at
+            """, (source, cursor, cursor_time, refreshed_at))
+
+    def prune(self, days):
+        """Delete topics older than the given number of days"""
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM topics WHERE timestamp < ?", (cutoff,))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @classmethod
+    def canonical_url(cls, url):
+        """Normalize a URL so the same article from different links gets one key"""
+        parsed = urlparse(url.strip())
+        if not parsed.netloc:
+            return ''
+
+        host = parsed.netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        query = urlencode([(k, v) for k, v in parse_qsl(parsed.query) if not cls.TRACKING_PARAMS.match(k)])
+        return urlunparse(('https', host, parsed.path.rstrip('/') or '/', '', query, ''))
+
+    @staticmethod
+    def title_hash(title):
+        """Hash a normalized title"""
+        normalized_title = ' '.join(re.sub(r'[^\w\s]', '', title.lower()).split())
+        return hashlib.sha1(normalized_title.encode('utf-8')).hexdigest()
+
+    def _row_to_topic(self, row):
+        return Topic(
+            title=row['title'],
+            source=row['source'],
+            url=row['url'],
+            timestamp=datetime.fromtimestamp(row['timestamp']),
+            summary=row['summary'],
+            score=row['score']
+        )
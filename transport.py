@@ -0,0 +1,242 @@
+import socket
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.request import ACCEPT_ENCODING
+
+import config
+
+
+class TransportStats:
+    """Thread-safe counters for requests, new connections and bytes transferred"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, requests=0, connections=0, wire_bytes=0, body_bytes=0):
+        with self._lock:
+            self.requests += requests
+            self.connections += connections
+            self.wire_bytes += wire_bytes
+            self.body_bytes += body_bytes
+
+    def snapshot(self):
+        """Get the counters as a dict; body_bytes are after decompression, wire_bytes before"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'reused': max(0, self.requests - self.connections),
+                'wire_bytes': self.wire_bytes,
+                'body_bytes': self.body_bytes
+            }
+
+
+_timing = threading.local()
+
+
+def _connection_timings():
+    """The timings dict of the request this thread is sending, or None"""
+    return getattr(_timing, 'timings', None)
+
+
+class _TimedConnectionMixin:
+    """Times DNS, TCP connect and TLS for each new connection, and counts it"""
+
+    stats = None
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        host = self._dns_host
+
+        # Resolve here so DNS time can be told apart from the connect; each
+        # address is tried in turn, as create_connection would
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in
+                                           socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)))
+        except OSError:
+            addresses = [host]  # let urllib3 report the resolution error
+        resolved = time.perf_counter()
+
+        try:
+            for index, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except ConnectTimeoutError:
+                    if index + 1 == len(addresses):
+                        raise
+        finally:
+            self._dns_host = host
+
+        timings = _connection_timings()
+        if timings is not None:
+            timings['dns'] += resolved - start
+            timings['connect'] += time.perf_counter() - resolved
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        timings = _connection_timings()
+        before = timings['dns'] + timings['connect'] if timings is not None else 0
+        super().connect()
+
+        if self.stats is not None:
+            self.stats.add(connections=1)
+        if timings is not None:
+            # Whatever connect() spent beyond the socket is the TLS handshake
+            elapsed = time.perf_counter() - start
+            timings['tls'] += max(0.0, elapsed - (timings['dns'] + timings['connect'] - before))
+
+
+class CountingPoolManager(PoolManager):
+    """PoolManager whose connections are counted (each one a TCP/TLS handshake) and timed"""
+
+    def __init__(self, stats, *args, **kwargs):
+        self.stats = stats
+        self._connection_classes = {}
+        super().__init__(*args, **kwargs)
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        base = pool.ConnectionCls
+        timed = self._connection_classes.get(base)
+        if timed is None:
+            timed = self._connection_classes[base] = type(
+                f'Timed{base.__name__}', (_TimedConnectionMixin, base), {'stats': self.stats})
+        pool.ConnectionCls = timed
+        return pool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a keep-alive pool for every host we scrape, counting new connections.
+
+    Retries are left to the fetcher, which knows about rate limits.
+    """
+
+    def __init__(self, stats=None, pool_hosts=config.HTTP_POOL_HOSTS, pool_maxsize=config.HTTP_POOL_MAXSIZE):
+        self.stats = stats or TransportStats()
+        super().__init__(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = CountingPoolManager(self.stats, num_pools=connections, maxsize=maxsize,
+                                               block=block, **pool_kwargs)
+
+
+class SessionPool:
+    """One requests.Session per thread, sharing headers, adapters and connection pools.
+
+    Sessions aren't thread-safe, but urllib3's pools are, so every thread gets
+    its own session while keep-alive connections are reused across threads.
+    Offers the parts of the Session API the scrapers use: headers, mount() and get().
+    """
+
+    def __init__(self, headers=None):
+        self.stats = TransportStats()
+        self.adapter = PooledAdapter(self.stats)
+
+        # Ask for every compression urllib3 can decode here (brotli/zstd when installed)
+        self.headers = requests.utils.default_headers()
+        self.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.headers.update(headers or {})
+
+        self._adapters = {'https://': self.adapter, 'http://': self.adapter}
+        self._sessions = weakref.WeakSet()  # sessions of threads still running
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """This thread's session"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers = self.headers
+            with self._lock:
+                for prefix, adapter in self._adapters.items():
+                    session.mount(prefix, adapter)
+                self._sessions.add(session)
+            self._local.session = session
+        return session
+
+    def mount(self, prefix, adapter):
+        """Send requests for URLs starting with prefix through adapter, in every thread"""
+        with self._lock:
+            self._adapters[prefix] = adapter
+            for session in self._sessions:
+                session.mount(prefix, adapter)
+
+    def get(self, url, **kwargs):
+        """GET through this thread's session; response.timings holds dns, connect, tls,
+        ttfb and total seconds and wire/body bytes (filled in by iter_content when streaming),
+        or is None for a response replayed from a cassette"""
+        timings = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'ttfb': 0.0, 'total': 0.0,
+                   'wire_bytes': 0, 'body_bytes': 0, 'start': time.perf_counter()}
+        _timing.timings = timings
+        try:
+            response = self.session.get(url, **kwargs)
+        finally:
+            _timing.timings = None
+        if getattr(response, 'from_cassette', False):
+            # Replayed without touching the network: no timings, so it counts as a cache hit
+            response.timings = None
+            return response
+        response.timings = timings
+        # requests measures elapsed up to the response headers
+        timings['ttfb'] = response.elapsed.total_seconds() if response.elapsed else 0.0
+        timings['total'] = time.perf_counter() - timings['start']
+
+        # Streamed bodies aren't read yet; iter_content counts them
+        if not kwargs.get('stream'):
+            body_bytes = len(response.content or b'')
+            raw = response.raw
+            self._count_body(timings, raw.tell() if hasattr(raw, 'tell') else body_bytes, body_bytes)
+        self.stats.add(requests=1)
+        return response
+
+    def iter_content(self, response, chunk_size):
+        """Iterate over a streamed response's body, counting the bytes read even if stopped early"""
+        if response.raw is None:
+            # Built from a cache or cassette with the body already in memory
+            content = response.content or b''
+            for start in range(0, len(content), chunk_size):
+                yield content[start:start + chunk_size]
+            return
+
+        body_bytes = 0
+        try:
+            for chunk in response.iter_content(chunk_size):
+                body_bytes += len(chunk)
+                yield chunk
+        finally:
+            raw = response.raw
+            timings = getattr(response, 'timings', None)
+            self._count_body(timings, raw.tell() if hasattr(raw, 'tell') else body_bytes, body_bytes)
+
+    def _count_body(self, timings, wire_bytes, body_bytes):
+        self.stats.add(wire_bytes=wire_bytes, body_bytes=body_bytes)
+        if timings is not None:
+            timings['wire_bytes'] = wire_bytes
+            timings['body_bytes'] = body_bytes
+            timings['total'] = time.perf_counter() - timings['start']
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            adapters = set(self._adapters.values())
+            self._sessions.clear()
+        for adapter in adapters:
+            adapter.close()